@@ -0,0 +1,167 @@
+"""
+KRISHI-NET AI ENGINE - POST-TRAINING QUANTIZATION
+
+Shrinks the trained disease model for CPU-only serving:
+- dynamic: int8 weights, float activations (no calibration data needed)
+- int8:    int8 weights and activations, calibrated on a representative
+           sample of DATA_DIR/train; input/output stay float32 so the
+           backend's TFLite loader serves it unchanged
+
+A quantized model is only kept if its top-1 accuracy on DATA_DIR/val stays
+within --max-drop of the float model; otherwise the script exits 1.
+
+Usage:
+    python ai/quantize_model.py --mode int8
+    python ai/quantize_model.py --mode dynamic --onnx   # also quantize the exported ONNX model
+
+Run from the repository root, after ai/train_model.py has exported the model.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+from train_model import DATA_DIR, EXPORT_DIR, IMG_SIZE
+
+# Must match backend/app/services/preprocess.py — the model is calibrated and
+# evaluated on exactly what the API feeds it
+INPUT_SCALE = 1.0 / 255.0
+
+
+def load_split(split, limit, shuffle):
+    """Up to `limit` (image, label index) pairs from DATA_DIR/<split>, preprocessed like the API."""
+    ds = tf.keras.utils.image_dataset_from_directory(
+        os.path.join(DATA_DIR, split),
+        label_mode='int',
+        image_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=1,
+        shuffle=shuffle,
+        seed=42,
+    )
+    return ds.unbatch().take(limit).map(lambda x, y: (x * INPUT_SCALE, y))
+
+
+def representative_dataset(samples):
+    """Calibration generator for the int8 converter: one (1, H, W, 3) float32 image per step."""
+    def gen():
+        for image, _ in load_split('train', samples, shuffle=True):
+            yield [tf.expand_dims(image, 0)]
+    return gen
+
+
+def quantize_tflite(model, mode, calibration_samples):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'int8':
+        converter.representative_dataset = representative_dataset(calibration_samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def tflite_predict(model_bytes):
+    interpreter = tf.lite.Interpreter(model_content=model_bytes)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+
+    def predict(image):
+        interpreter.set_tensor(inp['index'], image[np.newaxis].astype(np.float32))
+        interpreter.invoke()
+        return interpreter.get_tensor(out['index'])[0]
+    return predict
+
+
+def evaluate(model, quantized_predict, eval_samples):
+    """Top-1 accuracy of both models on DATA_DIR/val, plus how often they agree."""
+    correct_float = correct_quant = agree = total = 0
+    for image, label in load_split('val', eval_samples, shuffle=False):
+        image = image.numpy()
+        float_top = int(np.argmax(model.predict(image[np.newaxis], verbose=0)[0]))
+        quant_top = int(np.argmax(quantized_predict(image)))
+        correct_float += float_top == int(label)
+        correct_quant += quant_top == int(label)
+        agree += float_top == quant_top
+        total += 1
+    if total == 0:
+        raise SystemExit(f"No validation images found under {os.path.join(DATA_DIR, 'val')}")
+    return correct_float / total, correct_quant / total, agree / total
+
+
+def quantize_onnx(onnx_path):
+    """Dynamic int8 quantization of the exported ONNX model (weights only). Returns the new path."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_path = onnx_path.replace('.onnx', '_int8.onnx')
+    quantize_dynamic(onnx_path, out_path, weight_type=QuantType.QInt8)
+    return out_path
+
+
+def onnx_predict(onnx_path):
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+
+    def predict(image):
+        return session.run(None, {input_name: image[np.newaxis].astype(np.float32)})[0][0]
+    return predict
+
+
+def check(name, model, quantized_predict, args):
+    """Print the accuracy comparison; True if the drop is within --max-drop."""
+    float_acc, quant_acc, agreement = evaluate(model, quantized_predict, args.eval_samples)
+    drop = float_acc - quant_acc
+    print(f"[{name}] Float top-1: {float_acc:.4f} | Quantized top-1: {quant_acc:.4f} | "
+          f"Drop: {drop:+.4f} | Agreement: {agreement:.4f}")
+    if drop > args.max_drop:
+        print(f"[{name}] Accuracy drop {drop:.4f} exceeds --max-drop {args.max_drop} - quantized model NOT saved")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the Krishi-Net disease model")
+    parser.add_argument('--model', default=os.path.join(EXPORT_DIR, 'krishi_net_v2'), help="Float SavedModel")
+    parser.add_argument('--mode', choices=['dynamic', 'int8'], default='int8')
+    parser.add_argument('--calibration-samples', type=int, default=300)
+    parser.add_argument('--eval-samples', type=int, default=1000)
+    parser.add_argument('--max-drop', type=float, default=0.01,
+                        help="Largest acceptable top-1 accuracy drop vs the float model")
+    parser.add_argument('--onnx', action='store_true',
+                        help="Also write a dynamic int8 copy of krishi_net_v2.onnx")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model, compile=False)
+
+    print(f"Quantizing ({args.mode})...")
+    quantized = quantize_tflite(model, args.mode, args.calibration_samples)
+
+    print("Checking accuracy against the float model...")
+    failed = False
+    if check('tflite', model, tflite_predict(quantized), args):
+        out_path = os.path.join(EXPORT_DIR, f'krishi_net_v2_{args.mode}.tflite')
+        with open(out_path, 'wb') as f:
+            f.write(quantized)
+        print(f"Quantized model saved to {out_path} ({len(quantized) / 1e6:.1f} MB)")
+        print(f"Serve it with ML_BACKEND=tflite TFLITE_MODEL_PATH={out_path}")
+    else:
+        failed = True
+
+    if args.onnx:
+        out_path = quantize_onnx(os.path.join(EXPORT_DIR, 'krishi_net_v2.onnx'))
+        if check('onnx', model, onnx_predict(out_path), args):
+            print(f"ONNX int8 model saved to {out_path}")
+            print(f"Serve it with ML_BACKEND=onnx ONNX_MODEL_PATH={out_path}")
+        else:
+            os.remove(out_path)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
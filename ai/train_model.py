@@ -12,6 +12,7 @@ import tensorflow as tf
 from tensorflow.keras import layers, models, optimizers, callbacks
 from tensorflow.keras.applications import EfficientNetB4
 import numpy as np
+import argparse
 import os
 
 # --- Configuration ---
@@ -22,6 +23,7 @@ LEARNING_RATE = 1e-4
 # 38 (Original) + 5 (Wheat) + 3 (Rice) + 3 (Saffron) + 5 (Cotton) = 54
 NUM_CLASSES = 54  
 DATA_DIR = './data/raw_images'  # Updated to the new structure we discussed
+EXPORT_DIR = 'backend/app/saved_models'
 
 def build_augmenter():
     """Robust Data Augmentation for varying field conditions"""
@@ -133,8 +135,41 @@ def train_pipeline():
     model.fit(train_ds, validation_data=val_ds, epochs=15, callbacks=callbacks_list)
     
     # 8. Export for Backend (FastAPI) and Mobile
-    model.save('backend/app/saved_models/krishi_net_v2')
+    model.save(os.path.join(EXPORT_DIR, 'krishi_net_v2'))
     print("Model saved to backend directory.")
+    export_model(model)
+
+def export_model(model, export_dir=EXPORT_DIR):
+    """
+    Emit the lightweight inference formats the backend can serve
+    (ML_BACKEND=onnx / tflite) next to the SavedModel.
+    """
+    signature = [tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 3), tf.float32, name='input')]
+
+    # TFLite: float32 graph, served by tflite-runtime without full TensorFlow
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    tflite_path = os.path.join(export_dir, 'krishi_net_v2.tflite')
+    with open(tflite_path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"TFLite model saved to {tflite_path}")
+
+    # ONNX: needs tf2onnx at export time only
+    try:
+        import tf2onnx
+    except ImportError:
+        print("tf2onnx not installed - skipping ONNX export (pip install tf2onnx)")
+        return
+    onnx_path = os.path.join(export_dir, 'krishi_net_v2.onnx')
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=17, output_path=onnx_path)
+    print(f"ONNX model saved to {onnx_path}")
 
 if __name__ == '__main__':
-    train_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and export the Krishi-Net disease model")
+    parser.add_argument('--export-only', metavar='SAVED_MODEL',
+                        help="Skip training; export ONNX/TFLite from an existing SavedModel")
+    args = parser.parse_args()
+
+    if args.export_only:
+        export_model(tf.keras.models.load_model(args.export_only, compile=False))
+    else:
+        train_pipeline()
\ No newline at end of file
@@ -3,16 +3,14 @@ Generic AI text generation endpoint using Groq.
 Serves frontend functions that previously called Gemini directly.
 """
 
-import json
-import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
-from app.core.config import settings
+from app.api.streaming import stream_completion
+from app.services.groq_client import GroqClient, GroqError, get_groq_client
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 TEXT_MODEL = "llama-3.3-70b-versatile"
 
 
@@ -21,12 +19,16 @@ class GenerateRequest(BaseModel):
     json_mode: bool = False
     max_tokens: int = 1024
     temperature: float = 0.5
+    stream: bool = False  # Server-Sent Events, one frame per token
 
 
 @router.post("/generate")
-async def generate_text(request: GenerateRequest):
-    api_key = settings.GROQ_API_KEY
-    if not api_key:
+async def generate_text(
+    request: GenerateRequest,
+    http_request: Request,
+    groq: GroqClient = Depends(get_groq_client),
+):
+    if not groq.configured:
         raise HTTPException(status_code=503, detail="AI Service not configured")
 
     payload = {
@@ -39,35 +41,18 @@ async def generate_text(request: GenerateRequest):
     if request.json_mode:
         payload["response_format"] = {"type": "json_object"}
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    if request.stream:
+        return stream_completion(groq, payload, http_request, timeout=20.0)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GROQ_API_URL, json=payload, headers=headers, timeout=20.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                ai_text = (
-                    data.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "")
-                )
-                return {"response": ai_text}
-
-            elif response.status_code == 429:
-                raise HTTPException(status_code=429, detail="AI rate limited")
+        ai_text = await groq.chat_completion(payload, timeout=20.0)
+        return {"response": ai_text}
 
-            raise HTTPException(
-                status_code=500, detail=f"AI error: {response.status_code}"
-            )
-
-    except HTTPException:
-        raise
+    except GroqError as e:
+        if e.rate_limited:
+            raise HTTPException(status_code=429, detail="AI rate limited")
+        print(f"❌ AI Generate Error: {e}")
+        raise HTTPException(status_code=500, detail=f"AI error: {e.status_code or 'unavailable'}")
     except Exception as e:
         print(f"❌ AI Generate Error: {e}")
         raise HTTPException(status_code=500, detail="AI generation failed")
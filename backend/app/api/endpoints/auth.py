@@ -2,10 +2,13 @@
 Authentication endpoints: signup, login (password + OTP), verify, resend.
 """
 
+import math
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.core.config import settings
 from app.models.user import User
 from app.schemas.auth import (
     SignUpRequest, SignUpResponse,
@@ -16,21 +19,27 @@ from app.schemas.auth import (
 from app.services.auth_service import auth_service
 from app.services.otp_service import otp_service
 from app.core.security import create_access_token
+from app.core.rate_limit import RateLimiter, limit_by_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+otp_ip_limit = limit_by_ip(
+    RateLimiter("otp-ip", settings.OTP_IP_RATE_LIMIT, settings.OTP_IP_RATE_PERIOD),
+    detail="Too many OTP requests. Wait 10 minutes.",
+)
+
 
 # ============================================================
 # SIGN UP
 # ============================================================
 
 @router.post("/signup", response_model=SignUpResponse)
-async def signup(request: SignUpRequest, db: Session = Depends(get_db)):
+async def signup(request: SignUpRequest, db: AsyncSession = Depends(get_db)):
     """Sign up new user with email/phone + password. Sends OTP for verification."""
 
-    existing = db.query(User).filter(
-        (User.email == request.email) | (User.phone == request.phone)
-    ).first()
+    existing = (await db.execute(
+        select(User).where((User.email == request.email) | (User.phone == request.phone))
+    )).scalars().first()
 
     if existing:
         raise HTTPException(
@@ -49,7 +58,7 @@ async def signup(request: SignUpRequest, db: Session = Depends(get_db)):
     # Auto-verify for now (Bypass OTP)
     user.email_verified = True
     user.phone_verified = True
-    db.commit()
+    await db.commit()
 
     # Create access token immediately
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -72,10 +81,10 @@ async def signup(request: SignUpRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/verify-signup")
-async def verify_signup(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+async def verify_signup(request: OTPVerifyRequest, db: AsyncSession = Depends(get_db)):
     """Verify OTP during sign up."""
 
-    result = otp_service.verify_otp(
+    result = await otp_service.verify_otp(
         otp_code=request.otp,
         email=request.email,
         phone=request.phone,
@@ -86,15 +95,15 @@ async def verify_signup(request: OTPVerifyRequest, db: Session = Depends(get_db)
     if not result["success"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result["error"])
 
-    user = db.query(User).filter(
-        (User.email == request.email) | (User.phone == request.phone)
-    ).first()
+    user = (await db.execute(
+        select(User).where((User.email == request.email) | (User.phone == request.phone))
+    )).scalars().first()
 
     if request.email:
         user.email_verified = True
     if request.phone:
         user.phone_verified = True
-    db.commit()
+    await db.commit()
 
     access_token = create_access_token(data={"sub": str(user.id)})
 
@@ -117,7 +126,7 @@ async def verify_signup(request: OTPVerifyRequest, db: Session = Depends(get_db)
 # ============================================================
 
 @router.post("/login", response_model=LoginResponse)
-async def login_with_password(request: LoginRequest, db: Session = Depends(get_db)):
+async def login_with_password(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login with email/phone + password."""
 
     user = await auth_service.authenticate_user(
@@ -134,7 +143,7 @@ async def login_with_password(request: LoginRequest, db: Session = Depends(get_d
         )
 
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     access_token = create_access_token(data={"sub": str(user.id)})
 
@@ -155,13 +164,13 @@ async def login_with_password(request: LoginRequest, db: Session = Depends(get_d
 # LOGIN — OTP (Passwordless)
 # ============================================================
 
-@router.post("/send-otp")
-async def send_login_otp(request: SendOTPRequest, db: Session = Depends(get_db)):
+@router.post("/send-otp", dependencies=[Depends(otp_ip_limit)])
+async def send_login_otp(request: SendOTPRequest, db: AsyncSession = Depends(get_db)):
     """Send OTP for passwordless login."""
 
-    user = db.query(User).filter(
-        (User.email == request.email) | (User.phone == request.phone)
-    ).first()
+    user = (await db.execute(
+        select(User).where((User.email == request.email) | (User.phone == request.phone))
+    )).scalars().first()
 
     if not user:
         raise HTTPException(
@@ -179,6 +188,12 @@ async def send_login_otp(request: SendOTPRequest, db: Session = Depends(get_db))
         )
 
     if not result["success"]:
+        if result.get("retry_after"):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=result["error"],
+                headers={"Retry-After": str(math.ceil(result["retry_after"]))},
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result["error"],
         )
@@ -187,10 +202,10 @@ async def send_login_otp(request: SendOTPRequest, db: Session = Depends(get_db))
 
 
 @router.post("/login-otp")
-async def login_with_otp(request: OTPLoginRequest, db: Session = Depends(get_db)):
+async def login_with_otp(request: OTPLoginRequest, db: AsyncSession = Depends(get_db)):
     """Login with OTP (passwordless)."""
 
-    result = otp_service.verify_otp(
+    result = await otp_service.verify_otp(
         otp_code=request.otp,
         email=request.email,
         phone=request.phone,
@@ -201,12 +216,12 @@ async def login_with_otp(request: OTPLoginRequest, db: Session = Depends(get_db)
     if not result["success"]:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result["error"])
 
-    user = db.query(User).filter(
-        (User.email == request.email) | (User.phone == request.phone)
-    ).first()
+    user = (await db.execute(
+        select(User).where((User.email == request.email) | (User.phone == request.phone))
+    )).scalars().first()
 
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     access_token = create_access_token(data={"sub": str(user.id)})
 
@@ -223,7 +238,7 @@ async def login_with_otp(request: OTPLoginRequest, db: Session = Depends(get_db)
     }
 
 
-@router.post("/resend-otp")
-async def resend_otp(request: SendOTPRequest, db: Session = Depends(get_db)):
+@router.post("/resend-otp", dependencies=[Depends(otp_ip_limit)])
+async def resend_otp(request: SendOTPRequest, db: AsyncSession = Depends(get_db)):
     """Resend OTP — delegates to send_login_otp."""
     return await send_login_otp(request, db)
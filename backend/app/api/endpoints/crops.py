@@ -3,7 +3,8 @@ Crop management endpoints (CRUD).
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.database import get_db
@@ -17,11 +18,11 @@ router = APIRouter(prefix="/crops", tags=["Farm Management"])
 
 @router.get("/", response_model=List[CropOut])
 async def list_crops(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """List all crops for the current user."""
-    crops = db.query(Crop).filter(Crop.user_id == current_user.id).all()
+    crops = (await db.execute(select(Crop).where(Crop.user_id == current_user.id))).scalars().all()
     return [
         CropOut(
             id=str(c.id),
@@ -39,7 +40,7 @@ async def list_crops(
 @router.post("/", response_model=CropOut, status_code=status.HTTP_201_CREATED)
 async def create_crop(
     crop_data: CropCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Add a new crop to the user's farm."""
@@ -52,8 +53,8 @@ async def create_crop(
         expected_harvest_date=crop_data.expected_harvest_date,
     )
     db.add(crop)
-    db.commit()
-    db.refresh(crop)
+    await db.commit()
+    await db.refresh(crop)
 
     return CropOut(
         id=str(crop.id),
@@ -70,11 +71,13 @@ async def create_crop(
 async def update_crop(
     crop_id: str,
     crop_data: CropUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update an existing crop."""
-    crop = db.query(Crop).filter(Crop.id == crop_id, Crop.user_id == current_user.id).first()
+    crop = (await db.execute(
+        select(Crop).where(Crop.id == crop_id, Crop.user_id == current_user.id)
+    )).scalars().first()
 
     if not crop:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Crop not found")
@@ -83,8 +86,8 @@ async def update_crop(
     for key, value in update_data.items():
         setattr(crop, key, value)
 
-    db.commit()
-    db.refresh(crop)
+    await db.commit()
+    await db.refresh(crop)
 
     return CropOut(
         id=str(crop.id),
@@ -100,14 +103,16 @@ async def update_crop(
 @router.delete("/{crop_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_crop(
     crop_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete a crop."""
-    crop = db.query(Crop).filter(Crop.id == crop_id, Crop.user_id == current_user.id).first()
+    crop = (await db.execute(
+        select(Crop).where(Crop.id == crop_id, Crop.user_id == current_user.id)
+    )).scalars().first()
 
     if not crop:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Crop not found")
 
-    db.delete(crop)
-    db.commit()
+    await db.delete(crop)
+    await db.commit()
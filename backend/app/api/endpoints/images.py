@@ -0,0 +1,127 @@
+"""
+Scan image serving from the content-addressed blob store.
+Blobs never change once written, so responses carry the digest as a strong
+ETag and are cacheable forever. Range requests are honoured so clients can
+resume or partially fetch large photos.
+"""
+
+import os
+import re
+from typing import AsyncIterator, Optional, Tuple
+
+import aiofiles
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.services.blob_store import blob_store, sniff_content_type
+
+router = APIRouter(prefix="/images", tags=["Scan Images"])
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single "bytes=" range, or None to send the
+    whole file (malformed, last < first, or multi-range headers may be ignored
+    per RFC 9110). Raises 416 for a valid range that starts past the end of the file.
+    """
+    match = RANGE_RE.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the final N bytes
+        length = int(last)
+        start, end = max(0, size - length), size - 1
+        if length == 0:
+            start = size
+    else:
+        start = int(first)
+        if last and int(last) < start:
+            # Syntactically invalid range — ignore the header
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored and * matches any blob."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def _iter_file(path: str, start: int, length: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _serve_blob(request: Request, digest: str, thumbnail: bool) -> Response:
+    path = blob_store.existing_path(digest, thumbnail)
+    if path is None and thumbnail:
+        # Thumbnail generation failed for this image — serve the original
+        path, thumbnail = blob_store.existing_path(digest), False
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = f'"{digest}-thumb"' if thumbnail else f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    async with aiofiles.open(path, "rb") as f:
+        content_type = "image/jpeg" if thumbnail else sniff_content_type(await f.read(16))
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    # If-Range: only honour the range if the client's copy is still this blob
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size), media_type=content_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        _iter_file(path, start, end - start + 1),
+        status_code=206,
+        media_type=content_type,
+        headers=headers,
+    )
+
+
+@router.get("/{digest}")
+async def get_image(digest: str, request: Request):
+    """Original upload, by SHA-256 digest."""
+    return await _serve_blob(request, digest, thumbnail=False)
+
+
+@router.get("/{digest}/thumb")
+async def get_thumbnail(digest: str, request: Request):
+    """Small JPEG thumbnail for list views."""
+    return await _serve_blob(request, digest, thumbnail=True)
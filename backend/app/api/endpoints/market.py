@@ -3,14 +3,14 @@ Market analysis endpoint using Groq AI for agricultural market intelligence.
 """
 
 import json
-import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from app.core.config import settings
+from app.services.cache import ResponseCache
+from app.services.groq_client import GroqClient, GroqError, get_groq_client
 
 router = APIRouter(prefix="/market", tags=["Market"])
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 MARKET_MODEL = "llama-3.3-70b-versatile"
 
 
@@ -21,12 +21,40 @@ class MarketRequest(BaseModel):
     language: str = "en"
 
 
+# Thousands of farmers in one district ask the same question each morning
+market_cache = ResponseCache(
+    "market",
+    ttl=settings.MARKET_CACHE_TTL,
+    stale_ttl=settings.MARKET_CACHE_STALE_TTL,
+)
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+def _cache_key(request: MarketRequest) -> str:
+    # location isn't part of the prompt, so it isn't part of the key either
+    return "|".join(_normalize(v) for v in (request.state, request.district, request.language))
+
+
 @router.post("/analysis")
-async def get_market_analysis(request: MarketRequest):
-    api_key = settings.GROQ_API_KEY
-    if not api_key:
+async def get_market_analysis(
+    request: MarketRequest,
+    response: Response,
+    groq: GroqClient = Depends(get_groq_client),
+):
+    if not groq.configured:
         raise HTTPException(status_code=503, detail="AI Service not configured")
 
+    result, cache_status = await market_cache.get_or_compute(
+        _cache_key(request), lambda: _fetch_market_analysis(request, groq)
+    )
+    response.headers["X-Cache"] = cache_status.upper()
+    return result
+
+
+async def _fetch_market_analysis(request: MarketRequest, groq: GroqClient) -> dict:
     prompt = f"""
     Act as an expert Agricultural Market Analyst for India with access to real-time Mandi rates.
     Analyze the CURRENT market situation for:
@@ -52,40 +80,26 @@ async def get_market_analysis(request: MarketRequest):
         "response_format": {"type": "json_object"},
     }
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
     try:
         print(f"📊 Market analysis request via Groq ({MARKET_MODEL})...")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GROQ_API_URL, json=payload, headers=headers, timeout=20.0
-            )
+        ai_text = await groq.chat_completion(payload, timeout=20.0)
+        if ai_text:
+            return json.loads(ai_text.strip())
 
-            if response.status_code == 200:
-                data = response.json()
-                ai_text = (
-                    data.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "")
-                )
-                if ai_text:
-                    return json.loads(ai_text.strip())
-
-            elif response.status_code == 429:
-                raise HTTPException(
-                    status_code=429,
-                    detail="AI rate limited. Please try again in a few seconds.",
-                )
-
-            print(f"❌ Market error: {response.status_code} - {response.text[:200]}")
-            raise HTTPException(status_code=500, detail="Market analysis failed")
+        print("❌ Market error: empty response")
+        raise HTTPException(status_code=500, detail="Market analysis failed")
 
     except HTTPException:
         raise
+    except GroqError as e:
+        if e.rate_limited:
+            raise HTTPException(
+                status_code=429,
+                detail="AI rate limited. Please try again in a few seconds.",
+            )
+        print(f"❌ Market error: {e}")
+        raise HTTPException(status_code=500, detail="Market analysis failed")
     except Exception as e:
         print(f"❌ Market Analysis Error: {e}")
         raise HTTPException(status_code=500, detail="Market analysis failed")
@@ -7,44 +7,292 @@ Disease prediction endpoint.
 import asyncio
 import json
 import base64
+import time
 import traceback
-import httpx
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, HTTPException, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.core.config import settings
+from app.core.rate_limit import RateLimiter, limit_by_ip
+from app.core.security import get_optional_user
 from app.services.ml_service import ml_service
 from app.services.advice_service import get_safe_advice
+from app.services.preprocess import dhash, encode_vision_upload
+from app.services.job_queue import Job, QueueFullError, prediction_jobs
+from app.services.scan_cache import PerceptualCache
+from app.services.scan_service import save_scan
+from app.services.groq_client import GroqClient, GroqError, CircuitOpenError, get_groq_client
 
 router = APIRouter(prefix="/predict", tags=["Disease Detection"])
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Per-model budget, retries included — two models in sequence stay within 90s
 GROQ_TIMEOUT = 45
 
+predict_rate_limit = limit_by_ip(
+    RateLimiter("predict", settings.PREDICT_RATE_LIMIT, settings.PREDICT_RATE_PERIOD),
+    detail="Too many scans in a short time. Please wait a moment and try again.",
+)
+
+scan_cache = PerceptualCache(
+    settings.SCAN_CACHE_MAX_ENTRIES, settings.SCAN_CACHE_TTL, settings.SCAN_CACHE_MAX_DISTANCE
+)
+
 # Vision models to try in order (Llama 4 supports native vision)
 VISION_MODELS = ["meta-llama/llama-4-scout-17b-16e-instruct", "meta-llama/llama-4-maverick-17b-128e-instruct"]
 
 
-@router.post("/")
+async def _prepare_vision_upload(image_bytes: bytes) -> bytes:
+    """Apply the vision upload profile off the event loop; fall back to the raw bytes."""
+    try:
+        encoded = await asyncio.to_thread(
+            encode_vision_upload,
+            image_bytes,
+            settings.VISION_UPLOAD_MAX_EDGE,
+            settings.VISION_UPLOAD_JPEG_QUALITY,
+            settings.VISION_UPLOAD_STRIP_EXIF,
+        )
+        print(f"🗜️  Vision upload: {len(image_bytes) // 1024} KB → {len(encoded) // 1024} KB")
+        return encoded
+    except Exception as e:
+        print(f"⚠️ Could not re-encode image, sending original: {e}")
+        return image_bytes
+
+
+async def _call_vision_model(groq: GroqClient, base_payload: dict, model_name: str) -> dict:
+    """Run one vision model and return its parsed JSON diagnosis (raises on any failure)."""
+    print(f"✨ AI Pipeline — Model: {model_name}")
+    payload = {**base_payload, "model": model_name}
+
+    # Model fallback is the main retry path here, so keep per-model retries low
+    ai_text = await groq.chat_completion(payload, timeout=GROQ_TIMEOUT, max_retries=1)
+    if not ai_text:
+        raise GroqError(f"{model_name} returned an empty response")
+    try:
+        result = json.loads(ai_text.strip())
+    except json.JSONDecodeError:
+        raise GroqError(f"{model_name} returned invalid JSON")
+    print(f"🎯 Success | Model: {model_name}")
+    return result
+
+
+def _describe_failure(model_name: str, e: Exception) -> str:
+    if isinstance(e, CircuitOpenError):
+        print(f"🚧 {e}")
+        return str(e)
+    if isinstance(e, GroqError):
+        print(f"⚠️ {model_name} error: {e}. Trying next...")
+        return "Rate limited — please wait a moment" if e.rate_limited else str(e)
+    print(f"❌ {model_name} error: {e}")
+    return str(e)
+
+
+async def _sequential_vision_call(groq: GroqClient, base_payload: dict) -> dict:
+    """Try each vision model in order until one returns valid JSON."""
+    last_error = ""
+    for model_name in VISION_MODELS:
+        try:
+            return await _call_vision_model(groq, base_payload, model_name)
+        except Exception as e:
+            last_error = _describe_failure(model_name, e)
+    raise GroqError(last_error)
+
+
+def _hedge_delay(groq: GroqClient, model_name: str) -> float:
+    observed = groq.latency_percentile(
+        model_name,
+        settings.VISION_HEDGE_PERCENTILE,
+        min_samples=settings.VISION_HEDGE_MIN_SAMPLES,
+    )
+    return observed if observed is not None else settings.VISION_HEDGE_DEFAULT_DELAY
+
+
+async def _hedged_vision_call(groq: GroqClient, base_payload: dict) -> dict:
+    """
+    Start the primary model; if it hasn't answered within its latency percentile
+    (or fails), launch the next model in parallel. First valid JSON wins and the
+    remaining calls are cancelled.
+
+    A model whose hedge timer fired and which then lost or failed has its
+    elapsed time recorded as a lower-bound latency sample; otherwise its
+    percentile would only ever see calls faster than the current delay.
+    """
+    pending = {}
+    started = {}
+    hedged_past = set()  # tasks whose own hedge timer expired
+    remaining = list(VISION_MODELS)
+    last_error = ""
+    current = None
+
+    def launch():
+        nonlocal current
+        current = remaining.pop(0)
+        task = asyncio.create_task(_call_vision_model(groq, base_payload, current))
+        pending[task] = current
+        started[task] = time.monotonic()
+        return task
+
+    def record_censored(task):
+        if task in hedged_past:
+            groq.record_latency(pending[task], time.monotonic() - started[task])
+
+    timed_task = launch()
+    try:
+        while pending:
+            # Only wait for the hedge delay while there's still a model to launch;
+            # the delay belongs to the most recently launched model
+            timeout = _hedge_delay(groq, current) if remaining else None
+            done, _ = await asyncio.wait(
+                pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if not done:
+                hedged_past.add(timed_task)
+                slow = current
+                timed_task = launch()
+                print(f"🏁 Hedging: {slow} slower than {timeout:.1f}s — racing {current}")
+                continue
+
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    record_censored(task)
+                    last_error = _describe_failure(pending.pop(task), e)
+                else:
+                    pending.pop(task)
+                    return result
+
+            if not pending and remaining:
+                timed_task = launch()
+    finally:
+        for task in pending:
+            task.cancel()
+            record_censored(task)
+
+    raise GroqError(last_error)
+
+
+async def _perceptual_hash(image_bytes: bytes) -> Optional[int]:
+    """dHash of the upload off the event loop; None if the image can't be decoded."""
+    try:
+        return await asyncio.to_thread(dhash, image_bytes)
+    except Exception as e:
+        print(f"⚠️ Could not hash image, skipping result cache: {e}")
+        return None
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    image_bytes = await file.read()
+    if not image_bytes:
+        print("❌ Error: Received empty file")
+        raise HTTPException(status_code=400, detail="Empty file")
+    return image_bytes
+
+
+async def _diagnose(image_bytes: bytes, crop: str, groq: GroqClient) -> Tuple[dict, str]:
+    """Cached diagnosis of an upload. Returns (result, "HIT" | "MISS")."""
+    # Near-duplicate of a recent scan? Reuse its diagnosis
+    phash = await _perceptual_hash(image_bytes) if settings.SCAN_CACHE_ENABLED else None
+    if phash is not None and not scan_cache.usable(phash):
+        phash = None
+    if phash is not None:
+        cached = scan_cache.get(phash, crop)
+        if cached is not None:
+            result, distance = cached
+            print(f"♻️  Scan cache hit (distance {distance}) — skipping CNN + Groq")
+            return {**result, "cached": True}, "HIT"
+
+    result, cacheable = await _analyze_image(image_bytes, crop, groq)
+    if phash is not None and cacheable:
+        scan_cache.put(phash, crop, result)
+    return result, "MISS"
+
+
+@router.post("/", dependencies=[Depends(predict_rate_limit)])
 async def predict_disease(
+    response: Response,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     crop: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    groq: GroqClient = Depends(get_groq_client),
+    current_user=Depends(get_optional_user),
 ):
     """
     Disease Prediction Engine.
     Hybrid Intelligence: Edge ML Identification + Groq AI Vision.
     """
     print(f"📸 Received Analysis Request | Crop Context: {crop or 'None'}")
+    image_bytes = await _read_upload(file)
+    result, cache_status = await _diagnose(image_bytes, crop, groq)
+    response.headers["X-Cache"] = cache_status
 
-    # 1. Read Data
-    image_bytes = await file.read()
-    if not image_bytes:
-        print("❌ Error: Received empty file")
-        raise HTTPException(status_code=400, detail="Empty file")
+    # History for signed-in users, written after the response is sent
+    if current_user is not None:
+        background_tasks.add_task(
+            save_scan, result, crop=crop, user_id=str(current_user.id), image_bytes=image_bytes
+        )
+    return result
+
+
+@router.post("/jobs", status_code=202, dependencies=[Depends(predict_rate_limit)])
+async def submit_prediction_job(
+    file: UploadFile = File(...),
+    crop: str = Form(""),
+    groq: GroqClient = Depends(get_groq_client),
+    current_user=Depends(get_optional_user),
+):
+    """
+    Queue a diagnosis and return a job id at once; poll GET /predict/jobs/{id}.
+    For clients on flaky networks that can't hold a connection open through
+    the Groq vision calls.
+    """
+    image_bytes = await _read_upload(file)
+    user_id = str(current_user.id) if current_user else None
 
-    # 2. Local Identification (Optional Edge ML)
+    async def run(job: Job) -> dict:
+        result, _ = await _diagnose(image_bytes, crop, groq)
+        # The job id doubles as the scan id in the user's history
+        await save_scan(result, crop=crop, user_id=user_id, scan_id=job.id, image_bytes=image_bytes)
+        return result
+
+    try:
+        job = await prediction_jobs.submit(run, user_id=user_id)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many scans are being analysed right now. Please try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+    print(f"📸 Queued analysis job {job.id} | Crop Context: {crop or 'None'}")
+    return {**job.to_dict(), "poll_url": f"{settings.API_V1_STR}/predict/jobs/{job.id}"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_prediction_job(
+    job_id: str,
+    current_user=Depends(get_optional_user),
+):
+    """
+    Job status; once done, the diagnosis is under "result". Jobs queued or
+    running on another worker, or aged out of memory, are read from the DB.
+    """
+    user_id = str(current_user.id) if current_user else None
+
+    job = await prediction_jobs.lookup(job_id)
+    if job is None or (job.user_id and job.user_id != user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+async def _analyze_image(image_bytes: bytes, crop: str, groq: GroqClient) -> Tuple[dict, bool]:
+    """
+    Local CNN + Groq vision pipeline. Returns (result, cacheable); the degraded
+    edge-only fallback is not cacheable so a later upload gets a full diagnosis.
+    """
+    # 1. Local Identification (Optional Edge ML)
     ml_id = None
     if ml_service.model_loaded:
         try:
@@ -55,14 +303,15 @@ async def predict_disease(
                 print(f"✅ Local ML suggests: {ml_id['diseaseName']}")
         except Exception as e:
             print(f"⚠️ Local ML Failed: {e}")
+    elif ml_service.state == "loading":
+        print("⏳ Local ML still loading — going straight to Groq Vision")
 
-    # 3. Check API key
-    api_key = settings.GROQ_API_KEY
-    if not api_key:
+    # 2. Check API key
+    if not groq.configured:
         print("❌ Error: No Groq API Key configured")
         raise HTTPException(status_code=503, detail="AI Service not configured")
 
-    # 4. Build the prompt
+    # 3. Build the prompt
     context = f"The crop is {crop}." if crop else "Identify the crop first."
     if ml_id:
         context += f" Edge identification: '{ml_id['diseaseName']}'."
@@ -93,83 +342,39 @@ async def predict_disease(
     - Return ONLY the JSON object. No conversation. No markdown blocks.
     """
 
-    # 5. Encode image to base64
-    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-
-    # 6. Try each vision model
-    last_error = ""
+    # 4. Shrink + encode the image ONCE; the payload is reused for every model
+    upload_bytes = await _prepare_vision_upload(image_bytes)
+    image_b64 = base64.b64encode(upload_bytes).decode("utf-8")
 
-    for model_name in VISION_MODELS:
-        print(f"✨ AI Pipeline — Model: {model_name}")
-
-        payload = {
-            "model": model_name,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_b64}"
-                            },
+    base_payload = {
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{image_b64}"
                         },
-                    ],
-                }
-            ],
-            "temperature": 0.3,
-            "max_tokens": 1024,
-            "response_format": {"type": "json_object"},
-        }
-
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
+                    },
+                ],
+            }
+        ],
+        "temperature": 0.3,
+        "max_tokens": 1024,
+        "response_format": {"type": "json_object"},
+    }
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    GROQ_API_URL,
-                    json=payload,
-                    headers=headers,
-                    timeout=GROQ_TIMEOUT,
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    ai_text = (
-                        data.get("choices", [{}])[0]
-                        .get("message", {})
-                        .get("content", "")
-                    )
-                    if ai_text:
-                        result = json.loads(ai_text.strip())
-                        print(f"🎯 Success | Model: {model_name}")
-                        return result
-
-                elif response.status_code == 429:
-                    last_error = "Rate limited — please wait a moment"
-                    print(f"⚠️ Rate limited on {model_name}. Trying next...")
-                    await asyncio.sleep(2)
-                    continue
-                else:
-                    error_body = response.text
-                    last_error = f"{response.status_code}: {error_body[:200]}"
-                    print(f"⚠️ {model_name} error: {last_error}")
-                    continue
-
-        except httpx.TimeoutException:
-            last_error = f"{model_name} timed out ({GROQ_TIMEOUT}s)"
-            print(f"⏰ {last_error}")
-            continue
-        except Exception as e:
-            last_error = str(e)
-            print(f"❌ {model_name} error: {e}")
-            continue
+    # 5. Try the vision models (sequential fallback, or hedged race)
+    try:
+        if settings.VISION_HEDGING_ENABLED and len(VISION_MODELS) > 1:
+            return await _hedged_vision_call(groq, base_payload), True
+        return await _sequential_vision_call(groq, base_payload), True
+    except GroqError as e:
+        last_error = str(e)
 
-    # 7. Fall back to local ML if available
+    # 6. Fall back to local ML if available
     if ml_id:
         print("🔄 All AI models failed. Falling back to Edge ML result.")
         safe_advice = get_safe_advice(ml_id)
@@ -177,9 +382,9 @@ async def predict_disease(
             **ml_id,
             **safe_advice,
             "description": f"Cloud AI is currently unavailable. Providing expert fallback: {safe_advice['description']}",
-        }
+        }, False
 
-    # 8. Return error
+    # 7. Return error
     print(f"🚨 All AI models exhausted. Last error: {last_error}")
     raise HTTPException(
         status_code=502,
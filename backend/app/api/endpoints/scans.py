@@ -0,0 +1,75 @@
+"""
+Scan history endpoints (keyset-paginated, newest first).
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.database import get_db
+from app.models.disease import Scan
+from app.models.user import User
+from app.schemas.scan import ScanOut, ScanPage
+from app.services.scan_service import thumbnail_url
+
+router = APIRouter(prefix="/scans", tags=["Scan History"])
+
+
+def _encode_cursor(scan: Scan) -> str:
+    raw = f"{scan.scan_date.isoformat()}|{scan.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        scan_date, scan_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(scan_date), scan_id
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@router.get("/", response_model=ScanPage)
+async def list_scans(
+    limit: int = Query(settings.SCANS_PAGE_DEFAULT, ge=1, le=settings.SCANS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The current user's scans, newest first. Pass the returned next_cursor to
+    get the following page; it is null on the last page. Each page is one
+    range scan on ix_scans_user_id_scan_date_id however deep the user pages.
+    """
+    query = select(Scan).where(Scan.user_id == current_user.id)
+    if cursor:
+        scan_date, scan_id = _decode_cursor(cursor)
+        # Row-value comparison so the index seeks straight to the cursor;
+        # id breaks ties between scans in the same instant
+        query = query.where(tuple_(Scan.scan_date, Scan.id) < (scan_date, scan_id))
+    rows = (await db.execute(
+        query.order_by(Scan.scan_date.desc(), Scan.id.desc()).limit(limit + 1)
+    )).scalars().all()
+
+    page = rows[:limit]
+    return ScanPage(
+        items=[
+            ScanOut(
+                id=str(s.id),
+                disease_name=s.disease_name,
+                crop=s.crop,
+                confidence=s.confidence,
+                severity=s.severity,
+                image_url=s.image_url,
+                thumbnail_url=thumbnail_url(s.image_url),
+                scan_date=s.scan_date.isoformat(),
+            )
+            for s in page
+        ],
+        next_cursor=_encode_cursor(page[-1]) if len(rows) > limit else None,
+    )
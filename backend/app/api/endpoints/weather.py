@@ -3,79 +3,88 @@ Weather proxy endpoint — forwards to Open-Meteo API.
 Keeps the API key-free Open-Meteo flow on the backend for future expansion.
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List
 import httpx
 
+from app.core.config import settings
+from app.core.http import get_forecast_http, get_geocoding_http
+from app.services.weather_service import (
+    LocationNotFound,
+    WeatherUnavailable,
+    round_coords,
+    weather_service,
+)
+
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
 
-def _get_condition(code: int) -> str:
-    if code == 0:
-        return "Clear Sky"
-    if 1 <= code <= 3:
-        return "Partly Cloudy"
-    if 45 <= code <= 48:
-        return "Foggy"
-    if 51 <= code <= 55:
-        return "Drizzle"
-    if 61 <= code <= 67:
-        return "Rain"
-    if 71 <= code <= 77:
-        return "Snow"
-    if 80 <= code <= 82:
-        return "Showers"
-    if 95 <= code <= 99:
-        return "Thunderstorm"
-    return "Cloudy"
+class WeatherBatchRequest(BaseModel):
+    locations: List[str] = Field(..., min_length=1)
 
 
 @router.get("/")
-async def get_weather(location: str = Query(..., description="Location name (city/district)")):
+async def get_weather(
+    location: str = Query(..., description="Location name (city/district)"),
+    geo_client: httpx.AsyncClient = Depends(get_geocoding_http),
+    forecast_client: httpx.AsyncClient = Depends(get_forecast_http),
+):
     """Get weather for a location using Open-Meteo (no API key needed)."""
 
-    async with httpx.AsyncClient() as client:
-        # 1. Geocode
-        geo_resp = await client.get(
-            "https://geocoding-api.open-meteo.com/v1/search",
-            params={"name": location, "count": 1, "language": "en", "format": "json"},
-        )
-        geo_data = geo_resp.json()
-
-        if not geo_data.get("results"):
-            return {"error": "Location not found"}
-
-        lat = geo_data["results"][0]["latitude"]
-        lon = geo_data["results"][0]["longitude"]
-
-        # 2. Weather
-        weather_resp = await client.get(
-            "https://api.open-meteo.com/v1/forecast",
-            params={
-                "latitude": lat,
-                "longitude": lon,
-                "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
-                "daily": "weather_code,temperature_2m_max,precipitation_probability_max",
-                "timezone": "auto",
-                "forecast_days": 5,
-            },
+    # 1. Geocode (long-lived cache)
+    try:
+        lat, lon = await weather_service.geocode(location, geo_client)
+    except LocationNotFound:
+        return {"error": "Location not found"}
+
+    # 2. Weather (short-lived cache)
+    try:
+        return await weather_service.forecast(lat, lon, forecast_client)
+    except WeatherUnavailable:
+        return {"error": "Weather data unavailable"}
+
+
+@router.post("/batch")
+async def get_weather_batch(
+    request: WeatherBatchRequest,
+    geo_client: httpx.AsyncClient = Depends(get_geocoding_http),
+    forecast_client: httpx.AsyncClient = Depends(get_forecast_http),
+):
+    """
+    Weather for many locations in one request. Geocodes resolve concurrently;
+    all forecasts come from a single multi-coordinate Open-Meteo call.
+    Each result has the same shape as GET /weather/ plus its "location".
+    """
+    if len(request.locations) > settings.WEATHER_BATCH_MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.WEATHER_BATCH_MAX_LOCATIONS} locations per request",
         )
-        data = weather_resp.json()
-
-        if "current" not in data:
-            return {"error": "Weather data unavailable"}
-
-        forecast = []
-        for i in range(1, len(data["daily"]["time"])):
-            forecast.append({
-                "day": data["daily"]["time"][i],
-                "temp": round(data["daily"]["temperature_2m_max"][i]),
-                "rainChance": data["daily"]["precipitation_probability_max"][i],
-            })
-
-        return {
-            "temp": round(data["current"]["temperature_2m"]),
-            "condition": _get_condition(data["current"]["weather_code"]),
-            "humidity": data["current"]["relative_humidity_2m"],
-            "windSpeed": data["current"]["wind_speed_10m"],
-            "forecast": forecast,
-        }
+
+    # 1. Geocode (bounded parallelism, cached)
+    coords = await weather_service.geocode_many(
+        request.locations, geo_client, settings.WEATHER_BATCH_GEOCODE_CONCURRENCY
+    )
+    found = [c for c in coords if not isinstance(c, Exception)]
+
+    # 2. Forecasts (one upstream call for everything not cached)
+    forecasts = await weather_service.forecast_many(found, forecast_client) if found else {}
+
+    results = []
+    for location, point in zip(request.locations, coords):
+        if isinstance(point, LocationNotFound):
+            results.append({"location": location, "error": "Location not found"})
+            continue
+        if isinstance(point, Exception):
+            print(f"⚠️ Geocode failed for {location}: {point}")
+            results.append({"location": location, "error": "Location lookup failed"})
+            continue
+
+        weather = forecasts.get(round_coords(*point))
+        if weather is None or isinstance(weather, Exception):
+            results.append({"location": location, "error": "Weather data unavailable"})
+        else:
+            results.append({"location": location, **weather})
+
+    return {"results": results}
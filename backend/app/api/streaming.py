@@ -0,0 +1,57 @@
+"""
+Server-Sent Events helpers for streaming Groq completions to the client.
+"""
+
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.services.groq_client import GroqClient, GroqError
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one SSE frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _relay(
+    groq: GroqClient,
+    payload: dict,
+    http_request: Request,
+    timeout: float,
+    error_message: str,
+) -> AsyncIterator[str]:
+    tokens = groq.stream_chat_completion(payload, timeout=timeout)
+    try:
+        async for delta in tokens:
+            if await http_request.is_disconnected():
+                print("🔌 Client disconnected — cancelling stream")
+                break
+            yield sse_event({"token": delta})
+        else:
+            yield sse_event({}, event="done")
+    except GroqError as e:
+        print(f"❌ Stream error: {e}")
+        message = "AI rate limited" if e.rate_limited else error_message
+        yield sse_event({"error": message, "status": e.status_code}, event="error")
+    finally:
+        # Closes the upstream Groq connection if we stopped early
+        await tokens.aclose()
+
+
+def stream_completion(
+    groq: GroqClient,
+    payload: dict,
+    http_request: Request,
+    timeout: float = 20.0,
+    error_message: str = "AI generation failed",
+) -> StreamingResponse:
+    """Relay a Groq streaming completion as text/event-stream."""
+    return StreamingResponse(
+        _relay(groq, payload, http_request, timeout, error_message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
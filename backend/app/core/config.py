@@ -18,11 +18,19 @@ class Settings(BaseSettings):
 
     # ── Database ──
     DATABASE_URL: str = "sqlite:///./krishi_net.db"
+    # Derived from DATABASE_URL (aiosqlite / asyncpg) unless set explicitly
+    ASYNC_DATABASE_URL: Optional[str] = None
 
     # ── Security / JWT ──
     SECRET_KEY: str = "CHANGE_ME_IN_PRODUCTION_krishi_net_super_secret_key_2024"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    # bcrypt runs on a bounded pool; beyond workers + queue, logins get 429
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # Decoded tokens / user rows cached by get_current_user
+    AUTH_CACHE_TTL: float = 60.0
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
 
     # ── CORS ──
     # Allow all origins for production ease (Vercel, Mobile, etc.)
@@ -37,19 +45,126 @@ class Settings(BaseSettings):
             return json.loads(v)
         return v
 
+    # ── Outbound HTTP (pooled, per upstream host) ──
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 20.0
+
     # ── Groq AI ──
     GROQ_API_KEY: Optional[str] = None
+    # Retries use jittered exponential backoff unless Groq sends retry-after
+    GROQ_MAX_RETRIES: int = 2
+    GROQ_BACKOFF_BASE: float = 0.5
+    GROQ_BACKOFF_MAX: float = 8.0
+    GROQ_MAX_RETRY_WAIT: float = 10.0  # give up rather than wait longer than this
+    # Per-model circuit breaker
+    GROQ_CIRCUIT_FAILURE_THRESHOLD: int = 3
+    GROQ_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Hedged vision calls: if the primary model hasn't answered within its
+    # observed latency percentile, race the next model and keep the first answer
+    VISION_HEDGING_ENABLED: bool = False
+    VISION_HEDGE_PERCENTILE: float = 95.0
+    VISION_HEDGE_DEFAULT_DELAY: float = 8.0  # used until enough latency samples exist
+    VISION_HEDGE_MIN_SAMPLES: int = 20
+
+    # Vision upload profile: images are shrunk before being sent to Groq
+    VISION_UPLOAD_MAX_EDGE: int = 1024
+    VISION_UPLOAD_JPEG_QUALITY: int = 80
+    VISION_UPLOAD_STRIP_EXIF: bool = True
+
+    # ── Background prediction jobs (POST /predict/jobs) ──
+    PREDICT_JOB_WORKERS: int = 4
+    PREDICT_JOB_MAX_QUEUE: int = 64
+    PREDICT_JOB_RESULT_TTL: float = 60 * 60
+    # Job rows in the DB (for polling from any worker) are kept this long
+    PREDICT_JOB_RETENTION: float = 7 * 24 * 60 * 60
+    # Queued/running rows older than this belong to a worker that died; mark them failed
+    PREDICT_JOB_ORPHAN_AFTER: float = 15 * 60
+
+    # ── Scan history (GET /scans) ──
+    SCANS_PAGE_DEFAULT: int = 20
+    SCANS_PAGE_MAX: int = 100
+    # Content-addressed store for scan photos (served from /images/{sha256})
+    BLOB_STORE_PATH: str = "./blob_store"
+    # Stored photos are re-encoded without EXIF (GPS, device) — /images is public
+    SCAN_IMAGE_MAX_EDGE: int = 2048
+    SCAN_IMAGE_JPEG_QUALITY: int = 90
+    THUMBNAIL_MAX_EDGE: int = 256
+    THUMBNAIL_JPEG_QUALITY: int = 70
+
+    # ── Disease scan result cache (perceptual hash + crop) ──
+    SCAN_CACHE_ENABLED: bool = True
+    SCAN_CACHE_MAX_ENTRIES: int = 2048
+    SCAN_CACHE_TTL: float = 6 * 60 * 60
+    SCAN_CACHE_MAX_DISTANCE: int = 4  # bits out of 64 in the dHash
+
+    # ── Response cache ──
+    # "memory://" (per worker) or a Redis-compatible URL such as redis://localhost:6379/0
+    CACHE_BACKEND_URL: str = "memory://"
+    CACHE_MAX_ENTRIES: int = 1024
+    MARKET_CACHE_TTL: float = 3 * 60 * 60
+    MARKET_CACHE_STALE_TTL: float = 60 * 60
+
+    # ── Weather cache ──
+    GEOCODE_CACHE_PATH: str = "./geocode_cache.db"
+    GEOCODE_CACHE_TTL: float = 30 * 24 * 60 * 60
+    WEATHER_FORECAST_TTL: float = 15 * 60
+    WEATHER_FORECAST_STALE_TTL: float = 45 * 60
+    WEATHER_BATCH_MAX_LOCATIONS: int = 50
+    WEATHER_BATCH_GEOCODE_CONCURRENCY: int = 5
 
     # ── Twilio (SMS OTP) — Optional ──
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None
+    # http: Twilio REST over the pooled client (TWILIO_API_BASE can point at a stub); sdk: twilio package
+    SMS_TRANSPORT: str = "http"
+    TWILIO_API_BASE: str = "https://api.twilio.com"
+    # Background SMS queue (OTP texts)
+    SMS_QUEUE_MAX_SIZE: int = 1000
+    SMS_CONCURRENCY: int = 4
+    SMS_MAX_RETRIES: int = 3
+    SMS_BACKOFF_BASE: float = 1.0
+    SMS_BACKOFF_MAX: float = 30.0
+    SMS_DEAD_LETTER_PATH: str = "./sms_dead_letter.jsonl"
 
     # ── SMTP (Email OTP) ──
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_EMAIL: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = True  # disable for a local test server (e.g. aiosmtpd)
+    SMTP_TIMEOUT: float = 10.0
+    SMTP_IDLE_TIMEOUT: float = 60.0  # reconnect rather than reuse a session idle this long
+    # Background mail queue (OTP emails)
+    MAIL_QUEUE_MAX_SIZE: int = 1000
+    MAIL_MAX_RETRIES: int = 4
+    MAIL_BACKOFF_BASE: float = 1.0
+    MAIL_BACKOFF_MAX: float = 30.0
+
+    # ── Rate limiting (token buckets: N requests, refilled over PERIOD seconds) ──
+    # memory:// per worker, sqlite:///path shared on one host, redis://… across hosts
+    RATE_LIMIT_BACKEND_URL: str = "memory://"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUST_PROXY: bool = False  # honour X-Forwarded-For for the client IP
+    OTP_RATE_LIMIT: int = 3  # per email / phone
+    OTP_RATE_PERIOD: float = 10 * 60
+    OTP_IP_RATE_LIMIT: int = 10
+    OTP_IP_RATE_PERIOD: float = 10 * 60
+    PREDICT_RATE_LIMIT: int = 20
+    PREDICT_RATE_PERIOD: float = 60
+    CHAT_RATE_LIMIT: int = 30
+    CHAT_RATE_PERIOD: float = 60
+
+    # ── OTP maintenance ──
+    OTP_SWEEP_ENABLED: bool = True
+    OTP_SWEEP_INTERVAL_SECONDS: int = 15 * 60
+    OTP_SWEEP_BATCH_SIZE: int = 1000
+    OTP_SWEEP_RETENTION_MINUTES: int = 60
 
     # ── ML Model ──
     MODEL_PATH: str = os.path.join(
@@ -57,6 +172,26 @@ class Settings(BaseSettings):
         "saved_models",
         "krishi_net_v2",
     )
+    # Inference runtime: "auto" (ONNX → TFLite → Keras, whichever model file exists),
+    # "onnx", "tflite" or "keras". Export with `python ai/train_model.py --export-only`.
+    ML_BACKEND: str = "auto"
+    ONNX_MODEL_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "saved_models", "krishi_net_v2.onnx"
+    )
+    TFLITE_MODEL_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "saved_models", "krishi_net_v2.tflite"
+    )
+    # CPU threads per worker process (0 = runtime default, i.e. all cores).
+    # With several uvicorn workers on one box, set intra-op to cores // workers
+    # so the workers don't oversubscribe the CPU.
+    ML_INTRA_OP_THREADS: int = 0
+    ML_INTER_OP_THREADS: int = 0
+    # Micro-batching: concurrent scans are grouped into one forward pass
+    ML_BATCH_MAX_SIZE: int = 16
+    ML_BATCH_MAX_WAIT_MS: float = 10.0
+    # Image decode/resize runs off the event loop: "process", "thread" or "inline"
+    ML_PREPROCESS_EXECUTOR: str = "process"
+    ML_PREPROCESS_WORKERS: int = 2
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,84 @@
+"""
+Application-lifetime pool of outbound HTTP clients.
+One httpx.AsyncClient per upstream host so connection limits apply per host
+and TCP/TLS connections are kept alive between requests.
+"""
+
+from typing import Dict
+
+import httpx
+
+from app.core.config import settings
+
+# Upstream name → host, one pooled client each
+UPSTREAMS = {
+    "groq": "api.groq.com",
+    "geocoding": "geocoding-api.open-meteo.com",
+    "forecast": "api.open-meteo.com",
+    "twilio": "api.twilio.com",
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPClientRegistry:
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+
+    async def start(self):
+        """Create one pooled client per upstream (called from the startup hook)."""
+        for name in UPSTREAMS:
+            if name not in self._clients:
+                self._clients[name] = self._build_client()
+        if settings.HTTP2_ENABLED and not _http2_available():
+            print("⚠️  h2 package not installed — outbound HTTP/2 disabled")
+        print(f"🔌 HTTP client pool ready ({', '.join(self._clients)})")
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the pooled client for an upstream, creating it on first use."""
+        if name not in UPSTREAMS:
+            raise KeyError(f"Unknown upstream: {name}")
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[name] = client
+        return client
+
+    async def close(self):
+        """Close all pooled clients (called from the shutdown hook)."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+http_clients = HTTPClientRegistry()
+
+
+# ── FastAPI dependencies ──
+def get_geocoding_http() -> httpx.AsyncClient:
+    return http_clients.get("geocoding")
+
+
+def get_forecast_http() -> httpx.AsyncClient:
+    return http_clients.get("forecast")
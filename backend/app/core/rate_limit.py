@@ -0,0 +1,240 @@
+"""
+Token-bucket rate limiting for expensive endpoints (OTP sends, /predict/, /chat/).
+
+Each key (an email, phone number or client IP) gets a bucket of `capacity`
+tokens that refills continuously over `period` seconds. Buckets live in a
+pluggable store: in-process memory by default, a local SQLite file when
+several workers on one host must share limits, or any Redis-compatible
+server (redis://…) across hosts.
+"""
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+
+def _take(tokens: float, updated: float, now: float, capacity: float, rate: float) -> Tuple[float, float]:
+    """Refill a bucket up to now and try to take one token. Returns (tokens_left, retry_after)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryRateLimitStore:
+    """Per-process buckets. The least recently used keys are dropped beyond max_keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens, retry_after = _take(tokens, updated, now, capacity, capacity / period)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def close(self):
+        self._buckets.clear()
+
+
+class SQLiteRateLimitStore:
+    """
+    Buckets in a local SQLite file, shared by every worker process on the host.
+    Each take is one IMMEDIATE transaction, so concurrent workers serialise
+    on the file lock instead of double-spending tokens.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _take_sync(self, key: str, capacity: int, period: float) -> float:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens, retry_after = _take(tokens, updated, now, capacity, capacity / period)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return retry_after
+
+    def purge_idle(self, max_idle: float) -> int:
+        """Delete buckets untouched for max_idle seconds (they would be full anyway)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM rate_limits WHERE updated < ?", (time.time() - max_idle,)
+            )
+            return cur.rowcount
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        return await asyncio.to_thread(self._take_sync, key, capacity, period)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Atomic refill-and-take; the key expires once the bucket would be full again
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(data[1]) or capacity
+local updated = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitStore:
+    """Redis-compatible store (Redis, Valkey, KeyDB…) shared across hosts."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("redis package not installed — use RATE_LIMIT_BACKEND_URL=memory://")
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        result = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, capacity / period, time.time()])
+        return float(result)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def make_store(url: Optional[str] = None):
+    """Build a store from a URL: memory:// (default), sqlite:///path or redis://host:port/db."""
+    url = url or settings.RATE_LIMIT_BACKEND_URL
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            store = RedisRateLimitStore(url)
+            print(f"🚦 Rate limit store: {url}")
+            return store
+        except RuntimeError as e:
+            print(f"⚠️  {e}")
+    elif url.startswith("sqlite:///"):
+        print(f"🚦 Rate limit store: {url}")
+        return SQLiteRateLimitStore(url[len("sqlite:///"):])
+    return MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+_shared_store = None
+_limiters: List["RateLimiter"] = []
+
+
+def get_shared_store():
+    """One store per process, shared by every RateLimiter."""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = make_store()
+    return _shared_store
+
+
+async def close_shared_store():
+    global _shared_store
+    if _shared_store is not None:
+        await _shared_store.close()
+        _shared_store = None
+
+
+class RateLimiter:
+    def __init__(self, name: str, capacity: int, period: float, store=None):
+        """
+        Args:
+            name: Key prefix, so several limiters can share one store.
+            capacity: Burst size — requests allowed back to back from a full bucket.
+            period: Seconds for an empty bucket to refill completely.
+            store: Bucket store (defaults to the shared process store).
+        """
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self._store = store
+        self.stats = {"allowed": 0, "limited": 0}
+        _limiters.append(self)
+
+    @property
+    def store(self):
+        return self._store or get_shared_store()
+
+    async def hit(self, key: str) -> float:
+        """Take a token for key. Returns 0 when allowed, else seconds until the next token."""
+        retry_after = await self.store.take(f"{self.name}:{key}", self.capacity, self.period)
+        self.stats["limited" if retry_after else "allowed"] += 1
+        return retry_after
+
+    async def check(self, key: str, detail: str = "Too many requests. Please slow down."):
+        """hit() that raises 429 with a Retry-After header when the bucket is empty."""
+        retry_after = await self.hit(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=detail,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+def limiter_stats() -> dict:
+    return {limiter.name: limiter.stats for limiter in _limiters}
+
+
+def client_ip(request: Request) -> str:
+    """Caller's IP; X-Forwarded-For is only trusted behind a known proxy."""
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(limiter: RateLimiter, detail: str = "Too many requests. Please slow down.") -> Callable:
+    """
+    FastAPI dependency factory: one token per request from the caller's IP bucket.
+    Use as: dependencies=[Depends(limit_by_ip(my_limiter))]
+    """
+
+    async def dependency(request: Request):
+        await limiter.check(client_ip(request), detail)
+
+    return dependency
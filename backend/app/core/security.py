@@ -2,14 +2,20 @@
 JWT token creation/verification and password hashing utilities.
 """
 
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Optional
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.database import get_db
@@ -19,6 +25,10 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # ── OAuth2 scheme for JWT bearer tokens ──
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# Same scheme for endpoints that also serve anonymous callers
+oauth2_scheme_optional = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False
+)
 
 
 def hash_password(password: str) -> str:
@@ -31,6 +41,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasherPool:
+    """
+    Runs bcrypt on a small dedicated thread pool so login bursts can't block
+    the event loop. When more than workers + max_queue calls are pending,
+    new ones are rejected with 429 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a free bcrypt thread (excludes those running)."""
+        return max(0, self._pending - self.workers)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+        }
+
+    async def run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts right now. Please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded bcrypt pool (raises 429 when saturated)."""
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded bcrypt pool (raises 429 when saturated)."""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -65,9 +144,98 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+class AuthCache:
+    """
+    Short-TTL, size-bounded LRU for decoded tokens and user-row snapshots, so an
+    authenticated request usually skips both JWT decoding and the user query.
+    User entries are dropped whenever the ORM updates or deletes that user.
+    Entries are per worker process; the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None or time.monotonic() >= item[1]:
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self._data.pop(key, None)
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = AuthCache(settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_MAX_ENTRIES)
+user_cache = AuthCache(settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def invalidate_user(user_id: str):
+    """Drop a cached user row (call after out-of-ORM updates such as bulk UPDATEs)."""
+    user_cache.invalidate(str(user_id))
+
+
+def _register_user_invalidation():
+    from app.models.user import User  # lazy import to avoid circular
+
+    def _on_change(mapper, connection, target):
+        invalidate_user(target.id)
+
+    event.listen(User, "after_update", _on_change)
+    event.listen(User, "after_delete", _on_change)
+
+
+_register_user_invalidation()
+
+
+def _user_snapshot(user) -> dict:
+    """Plain column values of a User — what user_cache stores instead of the ORM object."""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(type(user)).column_attrs}
+
+
+def _user_from_snapshot(snapshot: dict, db: AsyncSession):
+    """
+    Rebuild a User from a cached snapshot as if it were loaded by this request's
+    session: a fresh instance per request, attached without a query, so handlers
+    can read or modify it like any other loaded row.
+    """
+    from app.models.user import User  # lazy import to avoid circular
+
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     FastAPI dependency: extracts user from JWT token.
@@ -75,7 +243,13 @@ async def get_current_user(
     """
     from app.models.user import User  # lazy import to avoid circular
 
-    payload = decode_access_token(token)
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_access_token(token)
+        # Never cache a token past its own expiry
+        exp = payload.get("exp")
+        token_cache.set(token, payload, ttl=exp - time.time() if exp else None)
+
     user_id: str = payload.get("sub")
     if user_id is None:
         raise HTTPException(
@@ -83,10 +257,28 @@ async def get_current_user(
             detail="Invalid token payload",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return _user_from_snapshot(snapshot, db)
+
+    user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
+    user_cache.set(user_id, _user_snapshot(user))
     return user
+
+
+async def get_optional_user(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    FastAPI dependency: the signed-in user, or None for anonymous requests.
+    A token that is present but invalid is still rejected with 401.
+    """
+    if not token:
+        return None
+    return await get_current_user(token, db)
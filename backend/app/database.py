@@ -1,8 +1,12 @@
 """
-Database engine, session factory, and Base declarative class.
+Database engines, session factories, and Base declarative class.
+
+The API runs on the async engine (aiosqlite locally, asyncpg for Postgres).
+The sync engine stays available for scripts, migrations and the shell.
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
@@ -10,6 +14,20 @@ from app.core.config import settings
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 connect_args = {"check_same_thread": False} if is_sqlite else {}
 
+
+def _async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        # Render/Heroku style URLs
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+
+# ── Sync (scripts) ──
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
@@ -18,14 +36,32 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ── Async (API) ──
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL),
+    connect_args=connect_args,
+)
+
+# expire_on_commit=False: attributes stay loaded after commit, so handlers
+# can keep reading them without an implicit (blocking) refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
-    FastAPI dependency that provides a database session per request.
+    FastAPI dependency that provides an async database session per request.
     Automatically closes the session when the request is done.
     """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db():
+    """Sync session generator for scripts and tooling."""
     db = SessionLocal()
     try:
         yield db
@@ -2,14 +2,20 @@
 Database initialization — creates all tables on startup.
 """
 
-from app.database import engine, Base
+from app.database import async_engine, Base
 
 # Import all models so they are registered with Base.metadata
-from app.models import User, OTP, Disease, Scan, Crop  # noqa: F401
+from app.models import User, OTP, Disease, Scan, Crop, PredictionJob  # noqa: F401
 
 
 async def init_db():
     """Create all database tables if they don't exist."""
     print("📦 Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     print("✅ Database tables ready")
+
+
+async def close_db():
+    """Dispose of pooled async connections (called from the shutdown hook)."""
+    await async_engine.dispose()
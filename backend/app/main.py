@@ -6,7 +6,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.core.config import settings
-from app.db.init_db import init_db
+from app.core.http import http_clients
+from app.core.rate_limit import close_shared_store, limiter_stats
+from app.core.security import password_hasher, token_cache, user_cache
+from app.db.init_db import init_db, close_db
+from app.services.blob_store import blob_store
+from app.services.cache import close_shared_backend
+from app.services.job_queue import prediction_jobs
+from app.services.mail_queue import mail_queue
+from app.services.maintenance import otp_sweeper
+from app.services.ml_service import ml_service
+from app.services.sms_queue import sms_queue
+from app.services.weather_service import weather_service
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -34,20 +45,53 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def startup_event():
     print("🌾 Starting Krishi-Net Backend...")
     await init_db()
+    await http_clients.start()
+    otp_sweeper.start()
+    mail_queue.start()
+    sms_queue.start()
+    prediction_jobs.start()
+    await prediction_jobs.fail_orphans()
 
-    # Try to load ML model (optional — won't crash if missing)
-    try:
-        from app.services.ml_service import ml_service
-
-        ml_service.load_model(settings.MODEL_PATH)
-    except Exception as e:
-        print(f"⚠️  ML model not loaded (optional): {e}")
+    # Load the ML model in the background (optional — /predict/ uses Groq until it's ready)
+    ml_service.start_background_load()
 
     print(f"✅ Krishi-Net API ready at http://0.0.0.0:8000")
     print(f"📖 API docs at http://0.0.0.0:8000/docs")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await otp_sweeper.stop()
+    await prediction_jobs.stop()
+    await mail_queue.stop()
+    await sms_queue.stop()
+    await ml_service.shutdown()
+    await http_clients.close()
+    await weather_service.close()
+    await close_shared_backend()
+    await close_shared_store()
+    await close_db()
+    password_hasher.shutdown()
+    print("👋 Krishi-Net Backend stopped")
+
+
 # ── Health Check ──
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "version": settings.VERSION}
+    return {
+        "status": "ok",
+        "version": settings.VERSION,
+        "model": ml_service.status,
+        "password_hasher": password_hasher.stats,
+        "auth_cache": {"tokens": token_cache.stats, "users": user_cache.stats},
+        "otp_sweeper": otp_sweeper.stats,
+        "rate_limits": limiter_stats(),
+        "mail_queue": {**mail_queue.stats, "queue_depth": mail_queue.queue_depth},
+        "sms_queue": {**sms_queue.stats, "queue_depth": sms_queue.queue_depth},
+        "blob_store": blob_store.stats,
+        "prediction_jobs": {
+            **prediction_jobs.stats,
+            "queue_depth": prediction_jobs.queue_depth,
+            "running": prediction_jobs.running,
+        },
+    }
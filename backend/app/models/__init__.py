@@ -3,3 +3,4 @@ from app.models.user import User
 from app.models.otp import OTP
 from app.models.disease import Disease, Scan
 from app.models.crop import Crop
+from app.models.job import PredictionJob
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON, Text, Boolean
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Index, JSON, Text, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -30,3 +30,9 @@ class Scan(Base):
     scan_date = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User")
+
+    __table_args__ = (
+        # GET /scans: WHERE user_id = ? AND (scan_date, id) < (?, ?)
+        # ORDER BY scan_date DESC, id DESC — keyset pagination straight off the index
+        Index("ix_scans_user_id_scan_date_id", "user_id", "scan_date", "id"),
+    )
@@ -0,0 +1,24 @@
+"""
+Prediction job status, shared by every API worker so POST /predict/jobs can be
+polled from any of them.
+"""
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON, Text
+from datetime import datetime
+from app.database import Base
+
+
+class PredictionJob(Base):
+    __tablename__ = "prediction_jobs"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=True)  # Null for anonymous scans
+
+    # queued → running → done | failed
+    status = Column(String, nullable=False, default="queued")
+    result = Column(JSON, nullable=True)  # Full diagnosis, exactly as returned while in memory
+    error = Column(Text, nullable=True)
+    status_code = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,11 +1,18 @@
 
-from sqlalchemy import Column, String, DateTime, Boolean, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Index
 import uuid
 from datetime import datetime, timedelta
 from app.database import Base
 
 class OTP(Base):
     __tablename__ = "otps"
+    __table_args__ = (
+        # Verify: WHERE email|phone = ? AND purpose = ? AND code = ? ORDER BY created_at DESC
+        Index("ix_otps_email_purpose_created_at", "email", "purpose", "created_at"),
+        Index("ix_otps_phone_purpose_created_at", "phone", "purpose", "created_at"),
+        # Expiry sweeper: WHERE expires_at < ?
+        Index("ix_otps_expires_at", "expires_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=True)  # Null for sign up OTPs
@@ -13,7 +13,13 @@ class ScanOut(BaseModel):
     confidence: float
     severity: Optional[str] = None
     image_url: str
+    thumbnail_url: Optional[str] = None
     scan_date: str
 
     class Config:
         from_attributes = True
+
+
+class ScanPage(BaseModel):
+    items: List[ScanOut]
+    next_cursor: Optional[str] = None
@@ -4,10 +4,11 @@ Auth service: user creation, authentication, password management.
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
 
 
 class AuthService:
@@ -17,18 +18,19 @@ class AuthService:
         phone: Optional[str],
         password: str,
         full_name: str,
-        db: Session,
+        db: AsyncSession,
     ) -> User:
         """Create a new user with hashed password."""
+        hashed = await hash_password_async(password)
         user = User(
             email=email,
             phone=phone,
-            hashed_password=hash_password(password),
+            hashed_password=hashed,
             full_name=full_name,
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         return user
 
     async def authenticate_user(
@@ -36,28 +38,28 @@ class AuthService:
         email: Optional[str],
         phone: Optional[str],
         password: str,
-        db: Session,
+        db: AsyncSession,
     ) -> Optional[User]:
         """Authenticate user by email/phone and password. Returns User or None."""
-        query = db.query(User)
+        query = select(User)
         if email:
-            query = query.filter(User.email == email)
+            query = query.where(User.email == email)
         elif phone:
-            query = query.filter(User.phone == phone)
+            query = query.where(User.phone == phone)
         else:
             return None
 
-        user = query.first()
+        user = (await db.execute(query)).scalars().first()
         if not user:
             return None
         if not user.hashed_password:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
         return user
 
-    def get_user_by_id(self, user_id: str, db: Session) -> Optional[User]:
-        return db.query(User).filter(User.id == user_id).first()
+    async def get_user_by_id(self, user_id: str, db: AsyncSession) -> Optional[User]:
+        return (await db.execute(select(User).where(User.id == user_id))).scalars().first()
 
 
 auth_service = AuthService()
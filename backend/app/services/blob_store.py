@@ -0,0 +1,120 @@
+"""
+Content-addressed image store for scan uploads.
+Uploads are re-encoded as JPEG without metadata before storing: blobs are
+served to anyone holding the URL, and phone photos carry EXIF such as GPS
+location. Each blob is stored once under the SHA-256 digest of the stored
+bytes (re-uploads of the same photo are deduplicated), alongside a small
+JPEG thumbnail for list views.
+Writes go to a temp file in the target directory and are renamed into
+place, so readers never see a partial file.
+
+Layout:
+    <BLOB_STORE_PATH>/objects/ab/abcdef…   original bytes
+    <BLOB_STORE_PATH>/thumbs/ab/abcdef…    JPEG thumbnail
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+from app.core.config import settings
+from app.services.preprocess import encode_vision_upload
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def sniff_content_type(head: bytes) -> str:
+    """Image MIME type from the file's magic bytes."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    return "application/octet-stream"
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.stats = {"writes": 0, "dedup_hits": 0, "thumbnail_failures": 0}
+
+    def path(self, digest: str, thumbnail: bool = False) -> str:
+        if not DIGEST_RE.match(digest):
+            raise ValueError("invalid digest")
+        kind = "thumbs" if thumbnail else "objects"
+        return os.path.join(self.root, kind, digest[:2], digest)
+
+    def existing_path(self, digest: str, thumbnail: bool = False) -> Optional[str]:
+        """Path to a stored blob, or None if the digest is unknown or malformed."""
+        try:
+            path = self.path(digest, thumbnail)
+        except ValueError:
+            return None
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def put_sync(self, upload: bytes) -> str:
+        """
+        Strip metadata from an uploaded image, store it (blocking) and return its
+        digest. Existing blobs are not rewritten.
+
+        Raises:
+            ValueError: The upload is not a decodable image; nothing is stored.
+        """
+        try:
+            data = encode_vision_upload(
+                upload, settings.SCAN_IMAGE_MAX_EDGE, settings.SCAN_IMAGE_JPEG_QUALITY, True
+            )
+        except Exception as e:
+            raise ValueError(f"unreadable image: {e}")
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            self.stats["dedup_hits"] += 1
+        else:
+            self._write_atomic(path, data)
+            self.stats["writes"] += 1
+
+        thumb_path = self.path(digest, thumbnail=True)
+        if not os.path.exists(thumb_path):
+            try:
+                thumb = encode_vision_upload(
+                    data, settings.THUMBNAIL_MAX_EDGE, settings.THUMBNAIL_JPEG_QUALITY, True
+                )
+                self._write_atomic(thumb_path, thumb)
+            except Exception as e:
+                # The original is still served; list views fall back to it
+                self.stats["thumbnail_failures"] += 1
+                print(f"⚠️  Thumbnail failed for {digest[:12]}: {e}")
+        return digest
+
+    async def put(self, upload: bytes) -> str:
+        """put_sync() off the event loop."""
+        return await asyncio.to_thread(self.put_sync, upload)
+
+
+blob_store = BlobStore(settings.BLOB_STORE_PATH)
@@ -0,0 +1,291 @@
+"""
+TTL response cache with LRU eviction, request coalescing and
+stale-while-revalidate refresh.
+
+Backends are pluggable: in-process memory by default, any Redis-compatible
+server (redis://…) when several workers should share entries, or a local
+SQLite file for entries that must survive restarts.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+
+
+class MemoryCacheBackend:
+    """In-process LRU store. Entries are dropped after max_age or when the cache is full."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[CacheEntry, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if time.time() >= expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, max_age: float):
+        self._data[key] = (entry, time.time() + max_age)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+    async def close(self):
+        self._data.clear()
+
+
+class RedisCacheBackend:
+    """Redis-compatible store (Redis, Valkey, KeyDB…). Eviction is left to the server's maxmemory policy."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("redis package not installed — use CACHE_BACKEND_URL=memory://")
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self._redis.get(key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CacheEntry(value=data["value"], stored_at=data["stored_at"])
+
+    async def set(self, key: str, entry: CacheEntry, max_age: float):
+        raw = json.dumps({"value": entry.value, "stored_at": entry.stored_at})
+        await self._redis.set(key, raw, ex=max(1, int(max_age)))
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class SQLiteCacheBackend:
+    """
+    Persistent store in a local SQLite file. Blocking sqlite3 calls run in a
+    worker thread; a small in-memory LRU sits in front for hot keys.
+    """
+
+    def __init__(self, path: str, memory_entries: int = 1024):
+        self.path = path
+        self._memory = MemoryCacheBackend(memory_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+        self._conn.commit()
+
+    def _get_sync(self, key: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, stored_at, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+
+    def _set_sync(self, key: str, raw: str, stored_at: float, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, raw, stored_at, expires_at),
+            )
+            self._conn.commit()
+
+    def _delete_sync(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows (blocking). Returns the number removed."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = await self._memory.get(key)
+        if entry is not None:
+            return entry
+        row = await asyncio.to_thread(self._get_sync, key)
+        if row is None:
+            return None
+        raw, stored_at, expires_at = row
+        entry = CacheEntry(value=json.loads(raw), stored_at=stored_at)
+        await self._memory.set(key, entry, expires_at - time.time())
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, max_age: float):
+        await self._memory.set(key, entry, max_age)
+        await asyncio.to_thread(
+            self._set_sync, key, json.dumps(entry.value), entry.stored_at, time.time() + max_age
+        )
+
+    async def delete(self, key: str):
+        await self._memory.delete(key)
+        await asyncio.to_thread(self._delete_sync, key)
+
+    async def close(self):
+        await self._memory.close()
+        with self._lock:
+            self._conn.close()
+
+
+def make_backend(url: Optional[str] = None):
+    """Build a cache backend from a URL: memory:// (default) or redis://host:port/db."""
+    url = url or settings.CACHE_BACKEND_URL
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            backend = RedisCacheBackend(url)
+            print(f"🗄️  Cache backend: {url}")
+            return backend
+        except RuntimeError as e:
+            print(f"⚠️  {e}")
+    return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+
+_shared_backend = None
+
+
+def get_shared_backend():
+    """One backend per process, shared by every ResponseCache namespace."""
+    global _shared_backend
+    if _shared_backend is None:
+        _shared_backend = make_backend()
+    return _shared_backend
+
+
+async def close_shared_backend():
+    global _shared_backend
+    if _shared_backend is not None:
+        await _shared_backend.close()
+        _shared_backend = None
+
+
+class ResponseCache:
+    def __init__(self, namespace: str, ttl: float, stale_ttl: float = 0.0, backend=None):
+        """
+        Args:
+            namespace: Key prefix, so several caches can share one backend.
+            ttl: Seconds an entry is served as fresh.
+            stale_ttl: Extra seconds a stale entry may be served while it is refreshed in the background.
+            backend: Storage backend (defaults to the shared process backend).
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._backend = backend
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refresh_errors": 0}
+
+    @property
+    def backend(self):
+        return self._backend or get_shared_backend()
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, str]:
+        """
+        Return (value, status) where status is "hit", "stale", "coalesced" or "miss".
+
+        Concurrent misses for the same key share a single compute() call.
+        Exceptions from compute() propagate to every waiter and nothing is cached.
+        """
+        full_key = self._key(key)
+        entry = await self.backend.get(full_key)
+
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return entry.value, "hit"
+            self.stats["stale_hits"] += 1
+            if full_key not in self._inflight:
+                self._start_refresh(full_key, compute, background=True)
+            return entry.value, "stale"
+
+        task = self._inflight.get(full_key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), "coalesced"
+
+        self.stats["misses"] += 1
+        task = self._start_refresh(full_key, compute)
+        return await asyncio.shield(task), "miss"
+
+    def _start_refresh(self, full_key: str, compute, background: bool = False) -> asyncio.Task:
+        async def run():
+            try:
+                value = await compute()
+                await self.backend.set(
+                    full_key,
+                    CacheEntry(value=value, stored_at=time.time()),
+                    self.ttl + self.stale_ttl,
+                )
+                return value
+            finally:
+                self._inflight.pop(full_key, None)
+
+        task = asyncio.create_task(run())
+        self._inflight[full_key] = task
+        if background:
+            # Nobody awaits a stale refresh unless a miss coalesces onto it, and
+            # those waiters must see the error — so log it here instead of swallowing it
+            task.add_done_callback(lambda t: self._log_refresh_error(full_key, t))
+        return task
+
+    def _log_refresh_error(self, full_key: str, task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        self.stats["refresh_errors"] += 1
+        print(f"⚠️  Cache refresh failed for {full_key}: {task.exception()}")
+
+    async def peek(self, key: str) -> Optional[Any]:
+        """Return a fresh cached value without computing anything (None on miss or stale)."""
+        entry = await self.backend.get(self._key(key))
+        if entry is None or time.time() - entry.stored_at >= self.ttl:
+            return None
+        self.stats["hits"] += 1
+        return entry.value
+
+    async def put(self, key: str, value: Any):
+        """Store a value computed elsewhere (e.g. by a bulk upstream call)."""
+        await self.backend.set(
+            self._key(key),
+            CacheEntry(value=value, stored_at=time.time()),
+            self.ttl + self.stale_ttl,
+        )
+
+    async def invalidate(self, key: str):
+        await self.backend.delete(self._key(key))
@@ -0,0 +1,359 @@
+"""
+Shared Groq chat-completions client.
+Centralises retries (honouring retry-after / rate-limit headers), jittered
+exponential backoff and a per-model circuit breaker so a degraded model is
+skipped immediately instead of burning the full request timeout.
+
+A call's timeout is an overall deadline: every attempt and backoff wait has
+to fit in the time left, so retries never stretch a call past it.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.http import http_clients
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Don't start a retry with less time than this left before the deadline
+MIN_ATTEMPT_SECONDS = 1.0
+
+
+class GroqError(Exception):
+    """Groq call failed. status_code is the upstream HTTP status (None for network errors)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status_code == 429
+
+
+class CircuitOpenError(GroqError):
+    """The model's circuit is open — it failed recently and is being skipped."""
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse retry-after ("7") or Groq reset headers ("2m59.56s", "120ms") into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def _retry_delay(response: httpx.Response) -> Optional[float]:
+    """Server-advertised wait before the next attempt, if any."""
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        delay = _parse_duration(response.headers.get(header))
+        if delay is not None:
+            return delay
+    return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → half-open (one trial call) → closed."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial slot without judging the model (bad request, cancellation)."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class GroqClient:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Recent call latencies per model (seconds), for hedging. The hedging
+        # caller adds lower-bound samples for calls its hedge timer cut short
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    @property
+    def configured(self) -> bool:
+        return bool(settings.GROQ_API_KEY)
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(
+                settings.GROQ_CIRCUIT_FAILURE_THRESHOLD,
+                settings.GROQ_CIRCUIT_RESET_SECONDS,
+            )
+        return self._breakers[model]
+
+    def record_latency(self, model: str, seconds: float):
+        self._latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+
+    def latency_percentile(self, model: str, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """Observed latency at the given percentile (0–100), or None until enough samples exist."""
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {settings.GROQ_API_KEY}",
+            "Content-Type": "application/json",
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        cap = min(settings.GROQ_BACKOFF_MAX, settings.GROQ_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def chat_completion(
+        self,
+        payload: dict,
+        timeout: float = 20.0,
+        max_retries: Optional[int] = None,
+    ) -> str:
+        """
+        POST a chat completion and return the first choice's message content.
+
+        Args:
+            payload: OpenAI-style request body (must include "model").
+            timeout: Overall deadline in seconds, covering every attempt and
+                backoff wait.
+            max_retries: Extra attempts after the first (defaults to GROQ_MAX_RETRIES).
+
+        Raises:
+            CircuitOpenError: The model is currently being skipped.
+            GroqError: All attempts failed.
+        """
+        model = payload["model"]
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{model} circuit open — skipping")
+
+        try:
+            return await self._post_with_retries(payload, breaker, timeout, max_retries)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+
+    async def _post_with_retries(
+        self,
+        payload: dict,
+        breaker: CircuitBreaker,
+        timeout: float,
+        max_retries: Optional[int],
+    ) -> str:
+        model = payload["model"]
+        retries = settings.GROQ_MAX_RETRIES if max_retries is None else max_retries
+        client = http_clients.get("groq")
+        last_error = GroqError("No attempt made")
+        deadline = time.monotonic() + timeout
+
+        for attempt in range(retries + 1):
+            delay = None
+            started = time.monotonic()
+            try:
+                # httpx timeouts are per phase (connect, each read…); wait_for
+                # holds the whole attempt to the deadline
+                response = await asyncio.wait_for(
+                    client.post(GROQ_API_URL, json=payload, headers=self._headers(), timeout=deadline - started),
+                    timeout=deadline - started,
+                )
+            except (httpx.TimeoutException, asyncio.TimeoutError):
+                last_error = GroqError(f"{model} timed out ({timeout}s)")
+            except httpx.HTTPError as e:
+                last_error = GroqError(f"{model} connection error: {e}")
+            else:
+                if response.status_code == 200:
+                    breaker.record_success()
+                    self.record_latency(model, time.monotonic() - started)
+                    data = response.json()
+                    return (
+                        data.get("choices", [{}])[0]
+                        .get("message", {})
+                        .get("content", "")
+                    )
+
+                last_error = GroqError(
+                    f"{response.status_code}: {response.text[:200]}", response.status_code
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    # Bad request / auth errors won't improve on retry and say
+                    # nothing about the model's health
+                    breaker.release()
+                    raise last_error
+                delay = _retry_delay(response)
+
+            if not await self._wait_before_retry(model, attempt, retries, last_error, delay, deadline):
+                break
+
+        self._record_failure(model, breaker)
+        raise last_error
+
+    async def _wait_before_retry(
+        self,
+        model: str,
+        attempt: int,
+        retries: int,
+        error: GroqError,
+        delay: Optional[float],
+        deadline: float,
+    ) -> bool:
+        """Sleep before the next attempt. Returns False when no retry should be made."""
+        if attempt >= retries:
+            return False
+        wait = delay if delay is not None else self._backoff(attempt)
+        if wait > settings.GROQ_MAX_RETRY_WAIT:
+            print(f"⚠️ Groq {model}: server asked for {wait:.1f}s wait — giving up")
+            return False
+        if deadline - time.monotonic() - wait < MIN_ATTEMPT_SECONDS:
+            print(f"⚠️ Groq {model}: {error} — no time left before the deadline to retry")
+            return False
+        print(f"🔁 Groq {model}: {error} — retry {attempt + 1}/{retries} in {wait:.2f}s")
+        await asyncio.sleep(wait)
+        return True
+
+    def _record_failure(self, model: str, breaker: CircuitBreaker):
+        breaker.record_failure()
+        if breaker.state != "closed":
+            print(f"🚧 Groq circuit open for {model}")
+
+    async def stream_chat_completion(
+        self,
+        payload: dict,
+        timeout: float = 20.0,
+        max_retries: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+
+        The deadline covers retries up to the first token; once streaming has
+        begun, timeout bounds each read and an upstream error is raised to the
+        caller. Closing the generator (e.g. on
+        client disconnect) closes the upstream connection.
+        """
+        model = payload["model"]
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{model} circuit open — skipping")
+
+        retries = settings.GROQ_MAX_RETRIES if max_retries is None else max_retries
+        client = http_clients.get("groq")
+        body = {**payload, "stream": True}
+        last_error = GroqError("No attempt made")
+        streaming = False
+        deadline = time.monotonic() + timeout
+
+        try:
+            for attempt in range(retries + 1):
+                delay = None
+                started = time.monotonic()
+                try:
+                    async with client.stream(
+                        "POST", GROQ_API_URL, json=body, headers=self._headers(), timeout=deadline - started
+                    ) as response:
+                        if response.status_code == 200:
+                            self.record_latency(model, time.monotonic() - started)
+                            streaming = True
+                            async for delta in self._iter_deltas(response):
+                                yield delta
+                            breaker.record_success()
+                            return
+
+                        text = (await response.aread()).decode(errors="replace")
+                        last_error = GroqError(f"{response.status_code}: {text[:200]}", response.status_code)
+                        if response.status_code not in RETRYABLE_STATUS:
+                            breaker.release()
+                            raise last_error
+                        delay = _retry_delay(response)
+                except httpx.TimeoutException:
+                    last_error = GroqError(f"{model} timed out ({timeout}s)")
+                except httpx.HTTPError as e:
+                    last_error = GroqError(f"{model} connection error: {e}")
+
+                if streaming:
+                    # Tokens already reached the caller — a retry would duplicate them
+                    break
+                if not await self._wait_before_retry(model, attempt, retries, last_error, delay, deadline):
+                    break
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release()
+            raise
+
+        self._record_failure(model, breaker)
+        raise last_error
+
+    @staticmethod
+    async def _iter_deltas(response: httpx.Response) -> AsyncIterator[str]:
+        """Parse OpenAI-style SSE lines ("data: {...}") into content deltas."""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+groq_client = GroqClient()
+
+
+def get_groq_client() -> GroqClient:
+    """FastAPI dependency for the shared Groq client."""
+    return groq_client
@@ -0,0 +1,120 @@
+"""
+Micro-batching engine for CNN inference.
+Collects concurrent prediction requests into a single batch and runs the
+forward pass on a dedicated worker thread so the event loop never blocks.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        forward_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+    ):
+        """
+        Args:
+            forward_fn: Blocking callable mapping an (N, H, W, C) batch to (N, classes).
+            max_batch_size: Upper bound on the number of images per forward pass.
+            max_wait_ms: How long to hold the first request while waiting for more.
+        """
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Requests taken off the queue but not yet answered (collecting or in the forward pass)
+        self._in_flight: List[Tuple[np.ndarray, asyncio.Future]] = []
+        # Single thread: the model is not guaranteed to be safe for concurrent calls
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-infer")
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, tensor: np.ndarray) -> np.ndarray:
+        """
+        Queue a single preprocessed image and wait for its prediction row.
+
+        Args:
+            tensor: Model input of shape (1, H, W, C).
+
+        Returns:
+            The model output row for this image.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((tensor, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """Block for one request, then gather more until the batch is full or the wait expires."""
+        items = self._in_flight = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            # Drop callers that gave up (client disconnect / cancellation)
+            items = self._in_flight = [(t, f) for t, f in items if not f.done()]
+            if not items:
+                continue
+
+            try:
+                batch = np.concatenate([t for t, _ in items], axis=0)
+                outputs = await loop.run_in_executor(self._executor, self.forward_fn, batch)
+            except Exception as e:
+                self._fail(items, e)
+                self._in_flight = []
+                continue
+
+            for i, (_, future) in enumerate(items):
+                if not future.done():
+                    future.set_result(outputs[i])
+            self._in_flight = []
+
+    @staticmethod
+    def _fail(items, error: Exception):
+        for _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    async def stop(self):
+        """Cancel the collector task and release the worker thread."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Fail anything still waiting (queued, being collected or mid-forward
+        # pass when the collector was cancelled) so callers don't hang during shutdown
+        stopped = RuntimeError("Inference engine stopped")
+        self._fail(self._in_flight, stopped)
+        self._in_flight = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._fail([self._queue.get_nowait()], stopped)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,300 @@
+"""
+Bounded background job queue for long-running requests.
+Callers get a job id straight away and poll for the result, so slow upstream
+calls never hold a client connection open. A fixed number of worker tasks
+bounds concurrency; when the queue is full, submit() refuses new work.
+
+Job state is kept in memory for JOB_RESULT_TTL seconds after completion.
+With a store, every state change (queued, running, done | failed) is also
+written through to the database, so a job can be polled from any worker
+process and after it has aged out of memory.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.job import PredictionJob
+
+
+SHUTDOWN_ERROR = "Server restarted before the job finished — please submit it again"
+
+
+class QueueFullError(Exception):
+    """No room for another job right now."""
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: Optional[str] = None
+    # queued → running → done | failed
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+            data["status_code"] = self.status_code
+        return data
+
+
+def _utc(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.replace(tzinfo=timezone.utc).timestamp() if value is not None else None
+
+
+class JobStore:
+    """
+    Write-through job status in the prediction_jobs table. Best-effort like
+    scan history: a failed write is logged and the job carries on in memory.
+    """
+
+    def __init__(self, retention: float, orphan_after: float, purge_interval: float = 5 * 60):
+        self.retention = retention
+        self.orphan_after = orphan_after
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+
+    async def save(self, job: Job):
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.merge(PredictionJob(
+                    id=job.id,
+                    user_id=job.user_id,
+                    status=job.status,
+                    result=job.result,
+                    error=job.error,
+                    status_code=job.status_code,
+                    created_at=_utc(job.created_at),
+                    finished_at=_utc(job.finished_at),
+                ))
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️  Could not save job {job.id}: {e}")
+        if time.monotonic() - self._last_purge > self.purge_interval:
+            await self._purge()
+            await self.fail_orphans(self.orphan_after)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(PredictionJob, job_id)
+        if row is None:
+            return None
+        return Job(
+            id=row.id,
+            user_id=row.user_id,
+            status=row.status,
+            created_at=_timestamp(row.created_at),
+            finished_at=_timestamp(row.finished_at),
+            result=row.result,
+            error=row.error,
+            status_code=row.status_code,
+        )
+
+    async def fail_orphans(self, older_than: float) -> int:
+        """
+        Mark queued/running rows created more than older_than seconds ago as
+        failed — their worker died without recording an outcome. The age bound
+        keeps a restarting worker from failing jobs other workers are still running.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(PredictionJob)
+                    .where(
+                        PredictionJob.status.in_(("queued", "running")),
+                        PredictionJob.created_at < cutoff,
+                    )
+                    .values(
+                        status="failed",
+                        error=SHUTDOWN_ERROR,
+                        status_code=503,
+                        finished_at=datetime.utcnow(),
+                    )
+                )
+                await db.commit()
+            return result.rowcount
+        except Exception as e:
+            print(f"⚠️  Could not fail orphaned jobs: {e}")
+            return 0
+
+    async def _purge(self):
+        """Delete job rows older than the retention window."""
+        self._last_purge = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(PredictionJob).where(PredictionJob.created_at < cutoff))
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️  Could not purge old jobs: {e}")
+
+
+class JobQueue:
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        max_queue: int,
+        result_ttl: float,
+        store: Optional[JobStore] = None,
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.result_ttl = result_ttl
+        self.store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._jobs: Dict[str, Job] = {}
+        self.stats = {"submitted": 0, "done": 0, "failed": 0, "rejected": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "running")
+
+    def start(self):
+        """Start the worker tasks (called from the startup hook, or lazily on first submit)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        print(f"🧰 {self.name} job queue started ({self.workers} workers, queue {self.max_queue})")
+
+    async def stop(self):
+        """Stop the workers. Running and still-queued jobs are recorded as failed so polls end."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            self._queue.task_done()
+            await self._abandon(job)
+
+    async def fail_orphans(self):
+        """Fail stored jobs left queued/running by a worker that crashed (called from the startup hook)."""
+        if self.store is None:
+            return
+        count = await self.store.fail_orphans(self.store.orphan_after)
+        if count:
+            print(f"🧹 Marked {count} orphaned {self.name} job(s) as failed")
+
+    async def _abandon(self, job: Job):
+        job.status, job.error, job.status_code = "failed", SHUTDOWN_ERROR, 503
+        job.finished_at = time.time()
+        self.stats["failed"] += 1
+        await self._save(job)
+
+    async def submit(self, run: Callable[[Job], Awaitable[dict]], user_id: Optional[str] = None) -> Job:
+        """
+        Queue run(job) and return the job as soon as its "queued" state is stored.
+
+        Raises:
+            QueueFullError: max_queue jobs are already waiting.
+        """
+        if not self._tasks:
+            self.start()
+        self._prune()
+        if self._queue.full():
+            self.stats["rejected"] += 1
+            raise QueueFullError(f"{self.name} queue is full")
+
+        job = Job(id=str(uuid.uuid4()), user_id=user_id)
+        # Stored before a worker can pick it up, so state writes stay in order
+        await self._save(job)
+        try:
+            self._queue.put_nowait((job, run))
+        except asyncio.QueueFull:
+            # Filled up while the row was being written
+            self.stats["rejected"] += 1
+            job.status, job.error, job.status_code = "failed", f"{self.name} queue is full", 503
+            job.finished_at = time.time()
+            await self._save(job)
+            raise QueueFullError(job.error)
+        self._jobs[job.id] = job
+        self.stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """In-memory job on this worker, if it hasn't aged out."""
+        return self._jobs.get(job_id)
+
+    async def lookup(self, job_id: str) -> Optional[Job]:
+        """Job from memory, else from the store (other workers' jobs, or aged out)."""
+        job = self.get(job_id)
+        if job is None and self.store is not None:
+            job = await self.store.load(job_id)
+        return job
+
+    async def _save(self, job: Job):
+        if self.store is not None:
+            await self.store.save(job)
+
+    def _prune(self):
+        """Forget finished jobs older than result_ttl."""
+        cutoff = time.time() - self.result_ttl
+        stale = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    async def _run(self):
+        while True:
+            job, run = await self._queue.get()
+            try:
+                job.status = "running"
+                await self._save(job)
+                job.result = await run(job)
+                job.status = "done"
+                self.stats["done"] += 1
+            except asyncio.CancelledError:
+                # Shutting down mid-job: record it so pollers aren't left waiting
+                self._queue.task_done()
+                await self._abandon(job)
+                raise
+            except HTTPException as e:
+                job.status, job.error, job.status_code = "failed", str(e.detail), e.status_code
+                self.stats["failed"] += 1
+            except Exception as e:
+                job.status, job.error, job.status_code = "failed", str(e), 500
+                self.stats["failed"] += 1
+                print(f"⚠️  {self.name} job {job.id} crashed: {e}")
+            job.finished_at = time.time()
+            self._queue.task_done()
+            await self._save(job)
+
+
+prediction_jobs = JobQueue(
+    "predict",
+    workers=settings.PREDICT_JOB_WORKERS,
+    max_queue=settings.PREDICT_JOB_MAX_QUEUE,
+    result_ttl=settings.PREDICT_JOB_RESULT_TTL,
+    store=JobStore(settings.PREDICT_JOB_RETENTION, settings.PREDICT_JOB_ORPHAN_AFTER),
+)
@@ -0,0 +1,171 @@
+"""
+Outbound mail queue.
+Requests enqueue a message and return immediately; a single background
+worker delivers it over one persistent, authenticated SMTP connection,
+retrying transient failures with jittered exponential backoff.
+
+smtplib is blocking, so every SMTP call runs on a dedicated one-thread
+executor that owns the connection.
+"""
+
+import asyncio
+import random
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Optional
+
+from app.core.config import settings
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies (bad recipient, auth rejected…) won't succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class MailQueue:
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.stats = {
+            "queued": 0,
+            "sent": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+            "connections": 0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the delivery worker (called from the startup hook, or lazily on first enqueue)."""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_MAX_SIZE)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, message: Message) -> bool:
+        """Queue a message for delivery. Returns False if the queue is full and it was dropped."""
+        if self._worker is None:
+            self.start()
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            print(f"⚠️  Mail queue full — dropped message to {message['To']}")
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Give queued mail a moment to go out, then stop the worker and close the connection."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Mail queue stopped with {self.queue_depth} undelivered messages")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(loop, message)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, loop, message: Message):
+        retries = settings.MAIL_MAX_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                await loop.run_in_executor(self._executor, self._send_sync, message)
+                self.stats["sent"] += 1
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                if _is_permanent(e) or attempt >= retries:
+                    self.stats["failed"] += 1
+                    print(f"⚠️  Email to {message['To']} failed: {e}")
+                    return
+                wait = random.uniform(0, min(settings.MAIL_BACKOFF_MAX, settings.MAIL_BACKOFF_BASE * (2 ** attempt)))
+                self.stats["retries"] += 1
+                print(f"🔁 Email to {message['To']}: {e} — retry {attempt + 1}/{retries} in {wait:.2f}s")
+                await asyncio.sleep(wait)
+            except Exception as e:
+                # Unexpected (bad header encoding, a bug…): count it and keep the worker alive
+                self.stats["failed"] += 1
+                print(f"❌ Email to {message['To']} failed unexpectedly: {e!r}")
+                return
+
+    # ── Executor thread only ──
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        try:
+            if settings.SMTP_STARTTLS:
+                conn.starttls()
+            conn.login(settings.SMTP_EMAIL, settings.SMTP_PASSWORD)
+        except Exception:
+            conn.close()
+            raise
+        self.stats["connections"] += 1
+        return conn
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except (smtplib.SMTPException, OSError):
+                self._conn.close()
+            self._conn = None
+
+    def _send_sync(self, message: Message):
+        # Servers drop idle sessions; reconnect instead of failing on the first send after a lull
+        if self._conn is not None and time.monotonic() - self._last_used > settings.SMTP_IDLE_TIMEOUT:
+            self._disconnect()
+
+        reused = self._conn is not None
+        if self._conn is None:
+            self._conn = self._connect()
+        try:
+            self._conn.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._conn = None
+            if not reused:
+                raise
+            # The kept-alive session died under us — one immediate retry on a fresh connection
+            self._conn = self._connect()
+            self._conn.send_message(message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+            # Per-message rejection; the session is still usable unless the server is closing it
+            if getattr(e, "smtp_code", None) == 421:
+                self._disconnect()
+            raise
+        except Exception:
+            # Transport errors, or anything that may have left the session mid-transaction
+            self._disconnect()
+            raise
+        self._last_used = time.monotonic()
+
+
+mail_queue = MailQueue()
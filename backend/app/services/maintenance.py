@@ -0,0 +1,100 @@
+"""
+Background maintenance: periodic sweep of expired and verified OTPs.
+Rows are deleted in bounded batches so a large backlog never holds a long
+write lock on the database.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, or_, select
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.otp import OTP
+
+
+class OTPSweeper:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "sweeps": 0,
+            "rows_removed": 0,
+            "last_sweep_rows": 0,
+            "last_sweep_ms": 0.0,
+            "last_sweep_at": None,
+            "errors": 0,
+        }
+
+    def start(self):
+        """Start the periodic sweep (called from the startup hook)."""
+        if not settings.OTP_SWEEP_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        print(f"🧹 OTP sweeper started (every {settings.OTP_SWEEP_INTERVAL_SECONDS}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️  OTP sweep failed: {e}")
+            await asyncio.sleep(settings.OTP_SWEEP_INTERVAL_SECONDS)
+
+    async def sweep(self) -> int:
+        """
+        Delete OTPs that are past retention, one batch per transaction.
+
+        Rows are kept for OTP_SWEEP_RETENTION_MINUTES after expiry (or after
+        creation, once verified) so a late verify still gets "OTP expired"
+        rather than "Invalid OTP".
+        """
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.OTP_SWEEP_RETENTION_MINUTES)
+        batch_size = max(1, settings.OTP_SWEEP_BATCH_SIZE)
+        removed = 0
+
+        while True:
+            async with AsyncSessionLocal() as db:
+                ids = (await db.execute(
+                    select(OTP.id)
+                    .where(or_(
+                        OTP.expires_at < cutoff,
+                        OTP.is_verified.is_(True) & (OTP.created_at < cutoff),
+                    ))
+                    .limit(batch_size)
+                )).scalars().all()
+                if not ids:
+                    break
+                await db.execute(delete(OTP).where(OTP.id.in_(ids)))
+                await db.commit()
+            removed += len(ids)
+            if len(ids) < batch_size:
+                break
+            # Let request handlers get at the database between batches
+            await asyncio.sleep(0)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["sweeps"] += 1
+        self.stats["rows_removed"] += removed
+        self.stats["last_sweep_rows"] = removed
+        self.stats["last_sweep_ms"] = round(elapsed_ms, 1)
+        self.stats["last_sweep_at"] = datetime.utcnow().isoformat()
+        if removed:
+            print(f"🧹 OTP sweep removed {removed} rows in {elapsed_ms:.0f}ms")
+        return removed
+
+
+otp_sweeper = OTPSweeper()
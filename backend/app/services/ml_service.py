@@ -1,29 +1,293 @@
 """
-ML Service for plant disease detection using TensorFlow CNN.
-Gracefully handles missing TensorFlow — logs warning and continues.
+ML Service for plant disease detection using the CNN.
+The model runs on a pluggable backend (Keras, ONNX Runtime or TFLite, see
+ML_BACKEND). Gracefully handles a missing runtime — logs warning and continues.
 """
 
+import asyncio
+import multiprocessing
+from abc import ABC, abstractmethod
+import os
+import time
 import numpy as np
-from typing import Dict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.inference_batcher import InferenceBatcher
+from app.services.preprocess import INPUT_SIZE, preprocess_image
+
+
+class InferenceBackend(ABC):
+    """
+    A loaded model behind a minimal interface: predict() maps a float32
+    (N, H, W, C) batch to (N, classes) scores. Only ever called from the
+    batcher's single worker thread.
+    """
+
+    name = "base"
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    @property
+    @abstractmethod
+    def input_shape(self) -> Tuple[int, int, int]:
+        """(H, W, C) expected by the model."""
+
+    @abstractmethod
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """(N, H, W, C) float32 batch → (N, classes) scores."""
+
+
+class KerasBackend(InferenceBackend):
+    """Full TensorFlow — heaviest import, but loads the SavedModel as trained."""
+
+    name = "keras"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        try:
+            import tensorflow as tf
+        except ImportError:
+            raise RuntimeError("TensorFlow not installed — CNN model unavailable (Groq fallback will be used)")
+        # Must be set before TensorFlow creates its thread pools (i.e. before loading)
+        if settings.ML_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(settings.ML_INTRA_OP_THREADS)
+        if settings.ML_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(settings.ML_INTER_OP_THREADS)
+        self.model = tf.keras.models.load_model(model_path)
+
+    @property
+    def input_shape(self) -> Tuple[int, int, int]:
+        return tuple(self.model.input_shape[1:])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.model.predict(batch, verbose=0)
+
+
+class ONNXBackend(InferenceBackend):
+    """ONNX Runtime on CPU — a fraction of TensorFlow's memory and usually faster per image."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime not installed — use ML_BACKEND=keras")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.ML_INTRA_OP_THREADS:
+            options.intra_op_num_threads = settings.ML_INTRA_OP_THREADS
+        if settings.ML_INTER_OP_THREADS:
+            options.inter_op_num_threads = settings.ML_INTER_OP_THREADS
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input = self.session.get_inputs()[0]
+
+    @property
+    def input_shape(self) -> Tuple[int, int, int]:
+        return tuple(self._input.shape[1:])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self._input.name: batch})[0]
+
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite interpreter — prefers the small tflite-runtime wheel, falls back to TensorFlow's."""
+
+    name = "tflite"
+
+    def __init__(self, model_path: str):
+        super().__init__(model_path)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tensorflow.lite import Interpreter
+            except ImportError:
+                raise RuntimeError("tflite-runtime not installed — use ML_BACKEND=keras")
+        # TFLite has a single intra-op pool; None keeps the runtime default
+        self.interpreter = Interpreter(
+            model_path=model_path, num_threads=settings.ML_INTRA_OP_THREADS or None
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+
+    @property
+    def input_shape(self) -> Tuple[int, int, int]:
+        return tuple(int(d) for d in self._input["shape"][1:])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        if batch.shape[0] != self._batch_size:
+            # The interpreter has fixed shapes; re-plan for the new batch size
+            self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch.shape[0]
+        self.interpreter.set_tensor(self._input["index"], batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output["index"])
+
+
+BACKENDS = {"onnx": ONNXBackend, "tflite": TFLiteBackend, "keras": KerasBackend}
+
+
+def _backend_path(kind: str) -> str:
+    return {
+        "keras": settings.MODEL_PATH,
+        "onnx": settings.ONNX_MODEL_PATH,
+        "tflite": settings.TFLITE_MODEL_PATH,
+    }[kind]
+
+
+def resolve_backend(kind: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Pick (backend, model_path) from ML_BACKEND. "auto" takes the lightest
+    exported model present on disk: ONNX, then TFLite, then the Keras SavedModel.
+    """
+    kind = (kind or settings.ML_BACKEND).lower()
+    if kind == "auto":
+        for candidate in BACKENDS:
+            if os.path.exists(_backend_path(candidate)):
+                return candidate, _backend_path(candidate)
+        return "keras", settings.MODEL_PATH
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown ML_BACKEND '{kind}' (expected auto, {', '.join(BACKENDS)})")
+    return kind, _backend_path(kind)
 
 
 class MLService:
     def __init__(self):
-        self.model = None
-        self.model_loaded = False
+        self.backend: Optional[InferenceBackend] = None
+        self.batcher = None
+        # not_loaded → loading → ready | failed
+        self.state = "not_loaded"
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_task: Optional[asyncio.Task] = None
         self.disease_classes = self._load_classes()
+        self._preprocess_executor: Optional[Executor] = None
+        # Cumulative per-stage preprocessing timings (ms)
+        self.preprocess_stats = {"count": 0, "decode_ms": 0.0, "resize_ms": 0.0, "normalize_ms": 0.0}
+
+    @property
+    def model_loaded(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "backend": self.backend.name if self.backend else None,
+            "error": self.load_error,
+            "load_seconds": self.load_seconds,
+        }
+
+    @property
+    def input_size(self) -> Tuple[int, int]:
+        """(width, height) to resize uploads to, taken from the loaded model."""
+        if self.backend is not None:
+            height, width = self.backend.input_shape[:2]
+            if isinstance(height, int) and isinstance(width, int):
+                return width, height
+        return INPUT_SIZE
+
+    def _load_sync(self, kind: str, model_path: str):
+        """Load the model with the chosen backend (blocking). Raises on failure."""
+        if not os.path.exists(model_path):
+            # Skip the multi-second runtime import when there is nothing to load
+            raise FileNotFoundError(f"no model at {model_path}")
+        self.backend = BACKENDS[kind](model_path)
+        self.batcher = InferenceBatcher(
+            self._forward,
+            max_batch_size=settings.ML_BATCH_MAX_SIZE,
+            max_wait_ms=settings.ML_BATCH_MAX_WAIT_MS,
+        )
 
-    def load_model(self, model_path: str):
-        """Load a saved TensorFlow/Keras model."""
+    def _mark_failed(self, e: Exception):
+        self.state = "failed"
+        self.load_error = str(e)
+        print(f"⚠️  ML model load failed: {e}")
+
+    def load_model(self, model_path: Optional[str] = None, backend: Optional[str] = None):
+        """Load the model (blocking — for scripts). Defaults to the configured backend."""
+        self.state = "loading"
+        self.load_error = None
         try:
-            import tensorflow as tf
-            self.model = tf.keras.models.load_model(model_path)
-            self.model_loaded = True
-            print(f"✅ ML Model loaded: {model_path}")
-        except ImportError:
-            print("⚠️  TensorFlow not installed — CNN model unavailable (Gemini fallback will be used)")
+            kind, default_path = resolve_backend(backend)
+            self._load_sync(kind, model_path or default_path)
+        except Exception as e:
+            self._mark_failed(e)
+            return
+        self.state = "ready"
+        print(f"✅ ML Model loaded ({self.backend.name}): {self.backend.model_path}")
+
+    def start_background_load(self):
+        """
+        Load and warm up the model in the background (called from the startup
+        hook) so the API starts serving — and passing health checks — at once.
+        """
+        if self._load_task is None and self.state != "ready":
+            self._load_task = asyncio.create_task(self._load_in_background())
+
+    async def _load_in_background(self):
+        self.state = "loading"
+        self.load_error = None
+        started = time.perf_counter()
+        try:
+            kind, model_path = resolve_backend()
+            await asyncio.to_thread(self._load_sync, kind, model_path)
+            await self._warm_up()
         except Exception as e:
-            print(f"⚠️  ML model load failed: {e}")
+            self._mark_failed(e)
+            return
+        self.load_seconds = round(time.perf_counter() - started, 2)
+        self.state = "ready"
+        print(f"✅ ML Model loaded ({kind}) and warmed up in {self.load_seconds}s: {model_path}")
+
+    async def _warm_up(self):
+        """One dummy inference so the first real request doesn't pay for graph tracing."""
+        width, height = self.input_size
+        await self.batcher.submit(np.zeros((1, height, width, 3), dtype=np.float32))
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """Blocking forward pass — only ever called from the batcher's worker thread."""
+        return self.backend.predict(batch)
+
+    async def shutdown(self):
+        """Stop loading, the batching engine and preprocessing pool (called from the app shutdown hook)."""
+        if self._load_task is not None and not self._load_task.done():
+            self._load_task.cancel()
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self._preprocess_executor is not None:
+            self._preprocess_executor.shutdown(wait=False, cancel_futures=True)
+            self._preprocess_executor = None
+
+    def _get_preprocess_executor(self) -> Optional[Executor]:
+        mode = settings.ML_PREPROCESS_EXECUTOR.lower()
+        if mode == "inline":
+            return None
+        if self._preprocess_executor is None:
+            workers = max(1, settings.ML_PREPROCESS_WORKERS)
+            if mode == "process":
+                # spawn, not fork: forking a process that has TensorFlow threads can deadlock
+                self._preprocess_executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._preprocess_executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="ml-preprocess"
+                )
+            print(f"🧵 Preprocessing pool started ({mode}, {workers} workers)")
+        return self._preprocess_executor
 
     def _load_classes(self):
         return [
@@ -47,25 +311,39 @@ class MLService:
         ]
 
     def preprocess(self, image_bytes: bytes) -> np.ndarray:
-        """Preprocess image bytes to model input tensor."""
-        from PIL import Image
-        import io
+        """Preprocess image bytes to model input tensor (blocking — for scripts)."""
+        tensor, _ = preprocess_image(image_bytes, self.input_size)
+        return tensor
 
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        image = image.resize((256, 256))
-        img_array = np.array(image) / 255.0
-        return np.expand_dims(img_array, axis=0)
+    async def preprocess_async(self, image_bytes: bytes) -> np.ndarray:
+        """Preprocess on the configured pool so decode/resize never blocks the event loop."""
+        executor = self._get_preprocess_executor()
+        size = self.input_size
+        if executor is None:
+            tensor, timings = preprocess_image(image_bytes, size)
+        else:
+            loop = asyncio.get_running_loop()
+            tensor, timings = await loop.run_in_executor(executor, preprocess_image, image_bytes, size)
+
+        self.preprocess_stats["count"] += 1
+        for stage, ms in timings.items():
+            self.preprocess_stats[stage] += ms
+        print(
+            f"⏱️  Preprocess: decode {timings['decode_ms']:.1f}ms | "
+            f"resize {timings['resize_ms']:.1f}ms | normalize {timings['normalize_ms']:.1f}ms"
+        )
+        return tensor
 
     async def predict(self, image_bytes: bytes) -> Dict:
         """Run prediction on image bytes using the loaded CNN model."""
         if not self.model_loaded:
             return {"error": "Model not loaded"}
 
-        processed = self.preprocess(image_bytes)
-        predictions = self.model.predict(processed)
-        top_idx = int(np.argmax(predictions[0]))
-        confidence = float(predictions[0][top_idx])
-        
+        processed = await self.preprocess_async(image_bytes)
+        scores = await self.batcher.submit(processed)
+        top_idx = int(np.argmax(scores))
+        confidence = float(scores[top_idx])
+
         if top_idx < len(self.disease_classes):
             disease_raw = self.disease_classes[top_idx]
         else:
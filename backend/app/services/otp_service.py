@@ -6,33 +6,34 @@ Twilio and SMTP are OPTIONAL — if not configured, OTP is logged to console.
 import random
 import string
 from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.otp import OTP
 from app.core.config import settings
+from app.core.rate_limit import RateLimiter
+from app.services.mail_queue import mail_queue
+from app.services.sms_queue import make_transport, sms_queue
+
+otp_send_limiter = RateLimiter("otp", settings.OTP_RATE_LIMIT, settings.OTP_RATE_PERIOD)
 
 
 class OTPService:
     def __init__(self):
-        self._twilio_client = None
         self._twilio_ready = False
         self._smtp_ready = False
 
         # ── Twilio (optional) ──
-        if settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN:
-            try:
-                from twilio.rest import Client
-                self._twilio_client = Client(
-                    settings.TWILIO_ACCOUNT_SID,
-                    settings.TWILIO_AUTH_TOKEN,
-                )
+        try:
+            sms_queue.transport = make_transport()
+            if sms_queue.transport is not None:
                 self._twilio_ready = True
-                print("✅ Twilio SMS client initialized")
-            except ImportError:
-                print("⚠️  Twilio package not installed — SMS OTP disabled")
-            except Exception as e:
-                print(f"⚠️  Twilio not available: {e}")
+                print(f"✅ Twilio SMS transport initialized ({sms_queue.transport.name})")
+        except Exception as e:
+            print(f"⚠️  Twilio not available: {e}")
 
         # ── SMTP (optional) ──
         if settings.SMTP_EMAIL and settings.SMTP_PASSWORD:
@@ -41,6 +42,17 @@ class OTPService:
         else:
             print("⚠️  SMTP not configured — OTPs will be logged to console")
 
+    async def _check_rate_limit(self, contact: str) -> Optional[dict]:
+        """Error result if this email/phone has used up its OTP sends, else None."""
+        retry_after = await otp_send_limiter.hit(contact)
+        if retry_after:
+            return {
+                "success": False,
+                "error": "Too many OTP requests. Wait 10 minutes.",
+                "retry_after": retry_after,
+            }
+        return None
+
     def generate_otp(self) -> str:
         """Generate 6-digit OTP."""
         return ''.join(random.choices(string.digits, k=6))
@@ -50,19 +62,14 @@ class OTPService:
         self,
         email: str,
         purpose: str,
-        db: Session,
+        db: AsyncSession,
         user_id: Optional[str] = None,
     ) -> dict:
         """Send OTP to email. Falls back to console logging if SMTP not configured."""
 
-        # Rate limit
-        recent = db.query(OTP).filter(
-            OTP.email == email,
-            OTP.created_at > datetime.utcnow() - timedelta(minutes=10),
-        ).count()
-
-        if recent >= 3:
-            return {"success": False, "error": "Too many OTP requests. Wait 10 minutes."}
+        limited = await self._check_rate_limit(f"email:{email}")
+        if limited:
+            return limited
 
         otp_code = self.generate_otp()
 
@@ -75,14 +82,12 @@ class OTPService:
             expires_at=datetime.utcnow() + timedelta(minutes=5),
         )
         db.add(otp_record)
-        db.commit()
-        db.refresh(otp_record)
+        await db.commit()
+        await db.refresh(otp_record)
 
         if self._smtp_ready:
-            try:
-                self._send_email(email, otp_code, purpose)
-            except Exception as e:
-                print(f"⚠️  Email send failed: {e}")
+            # Delivered by the background mail worker; the OTP row is already committed
+            mail_queue.enqueue(self._build_email(email, otp_code, purpose))
         else:
             # ── Demo mode — print to console ──
             print(f"📨 [DEMO OTP] Email to {email}: {otp_code}  (purpose: {purpose})")
@@ -94,11 +99,8 @@ class OTPService:
             "expires_in": 300,
         }
 
-    def _send_email(self, email: str, otp_code: str, purpose: str):
-        """Actual SMTP send — only called if SMTP is configured."""
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
+    def _build_email(self, email: str, otp_code: str, purpose: str) -> MIMEMultipart:
+        """OTP email for the mail queue — only called if SMTP is configured."""
 
         body = f"""
         <html><body style="font-family:Arial,sans-serif;padding:20px;">
@@ -116,29 +118,21 @@ class OTPService:
         msg["From"] = settings.SMTP_EMAIL
         msg["To"] = email
         msg.attach(MIMEText(body, "html"))
-
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_EMAIL, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+        return msg
 
     # ──────────────────── SMS OTP ────────────────────
     async def send_sms_otp(
         self,
         phone: str,
         purpose: str,
-        db: Session,
+        db: AsyncSession,
         user_id: Optional[str] = None,
     ) -> dict:
         """Send OTP via SMS. Falls back to console logging if Twilio not configured."""
 
-        recent = db.query(OTP).filter(
-            OTP.phone == phone,
-            OTP.created_at > datetime.utcnow() - timedelta(minutes=10),
-        ).count()
-
-        if recent >= 3:
-            return {"success": False, "error": "Too many OTP requests. Wait 10 minutes."}
+        limited = await self._check_rate_limit(f"phone:{phone}")
+        if limited:
+            return limited
 
         otp_code = self.generate_otp()
 
@@ -151,18 +145,14 @@ class OTPService:
             expires_at=datetime.utcnow() + timedelta(minutes=5),
         )
         db.add(otp_record)
-        db.commit()
-        db.refresh(otp_record)
+        await db.commit()
+        await db.refresh(otp_record)
 
         if self._twilio_ready:
-            try:
-                self._twilio_client.messages.create(
-                    body=f"Your Krishi OTP is: {otp_code}. Valid for 5 minutes.",
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    to=phone,
-                )
-            except Exception as e:
-                print(f"⚠️  SMS send failed: {e}")
+            # Delivered by the background SMS workers; the OTP row is already committed
+            sms_queue.enqueue(
+                phone, f"Your Krishi OTP is: {otp_code}. Valid for 5 minutes.", purpose
+            )
         else:
             print(f"📱 [DEMO OTP] SMS to {phone}: {otp_code}  (purpose: {purpose})")
 
@@ -174,25 +164,27 @@ class OTPService:
         }
 
     # ──────────────────── VERIFY ────────────────────
-    def verify_otp(
+    async def verify_otp(
         self,
         otp_code: str,
         email: Optional[str] = None,
         phone: Optional[str] = None,
         purpose: Optional[str] = None,
-        db: Session = None,
+        db: AsyncSession = None,
     ) -> dict:
         """Verify an OTP code."""
-        query = db.query(OTP).filter(OTP.code == otp_code)
+        query = select(OTP).where(OTP.code == otp_code)
 
         if email:
-            query = query.filter(OTP.email == email)
+            query = query.where(OTP.email == email)
         if phone:
-            query = query.filter(OTP.phone == phone)
+            query = query.where(OTP.phone == phone)
         if purpose:
-            query = query.filter(OTP.purpose == purpose)
+            query = query.where(OTP.purpose == purpose)
 
-        otp_record = query.order_by(OTP.created_at.desc()).first()
+        otp_record = (
+            await db.execute(query.order_by(OTP.created_at.desc()).limit(1))
+        ).scalars().first()
 
         if not otp_record:
             return {"success": False, "error": "Invalid OTP"}
@@ -207,14 +199,14 @@ class OTPService:
 
         if otp_record.code == otp_code:
             otp_record.is_verified = True
-            db.commit()
+            await db.commit()
             return {
                 "success": True,
                 "message": "OTP verified successfully",
                 "user_id": str(otp_record.user_id) if otp_record.user_id else None,
             }
         else:
-            db.commit()
+            await db.commit()
             return {"success": False, "error": "Incorrect OTP"}
 
 
@@ -0,0 +1,82 @@
+"""
+Near-duplicate result cache for disease scans.
+Keyed by the crop plus a perceptual hash of the photo, so a farmer re-sending
+the same (or a re-compressed, slightly shifted) leaf photo gets the earlier
+diagnosis back instead of another CNN pass and Groq vision call.
+
+Matching is by Hamming distance, which a key-value store can't index, so
+entries are per process with TTL expiry and LRU eviction.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class PerceptualCache:
+    def __init__(self, max_entries: int, ttl: float, max_distance: int):
+        """
+        Args:
+            max_entries: LRU bound across all crops.
+            ttl: Seconds a diagnosis is reused.
+            max_distance: Largest Hamming distance (in bits) still treated as the same photo.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._data: "OrderedDict[Tuple[str, int], Tuple[dict, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0}
+
+    def usable(self, phash: int, bits: int = 64) -> bool:
+        """
+        Flat or nearly featureless images (blank frames, solid colours) all
+        hash to ~0 and would match each other, so they're never cached.
+        """
+        return self.max_distance < phash.bit_count() < bits - self.max_distance
+
+    @staticmethod
+    def _crop_key(crop: str) -> str:
+        return crop.strip().lower()
+
+    def get(self, phash: int, crop: str) -> Optional[Tuple[dict, int]]:
+        """Return (result, distance) for the closest live entry within max_distance, else None."""
+        crop = self._crop_key(crop)
+        now = time.monotonic()
+
+        # Exact repeat — the common case on a flaky connection
+        item = self._data.get((crop, phash))
+        if item is not None and now < item[1]:
+            self._data.move_to_end((crop, phash))
+            self.stats["hits"] += 1
+            return dict(item[0]), 0
+
+        best_key, best_distance = None, self.max_distance + 1
+        expired = []
+        for key, (_, expires_at) in self._data.items():
+            if now >= expires_at:
+                expired.append(key)
+                continue
+            if key[0] != crop:
+                continue
+            distance = (key[1] ^ phash).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        for key in expired:
+            del self._data[key]
+
+        if best_key is None:
+            self.stats["misses"] += 1
+            return None
+        self._data.move_to_end(best_key)
+        self.stats["near_hits"] += 1
+        return dict(self._data[best_key][0]), best_distance
+
+    def put(self, phash: int, crop: str, result: dict):
+        key = (self._crop_key(crop), phash)
+        self._data[key] = (dict(result), time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,59 @@
+"""
+Scan history persistence.
+"""
+
+from typing import Optional
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.disease import Scan
+from app.services.blob_store import blob_store
+
+
+def image_url(digest: str) -> str:
+    return f"{settings.API_V1_STR}/images/{digest}"
+
+
+def thumbnail_url(url: str) -> Optional[str]:
+    """Thumbnail for a stored image URL (None for scans saved before images were kept)."""
+    return f"{url}/thumb" if url else None
+
+
+async def save_scan(
+    result: dict,
+    crop: str = "",
+    user_id: Optional[str] = None,
+    scan_id: Optional[str] = None,
+    image_bytes: Optional[bytes] = None,
+) -> Optional[str]:
+    """
+    Store the upload in the blob store and write the diagnosis to the scans
+    table in its own session, so it can run after the request's session is
+    gone. Returns the scan id, or None if the write failed (history is
+    best-effort and never fails a diagnosis).
+    """
+    try:
+        url = ""
+        if image_bytes:
+            try:
+                url = image_url(await blob_store.put(image_bytes))
+            except ValueError as e:
+                # Keep the diagnosis even if the photo can't be stored
+                print(f"⚠️  Could not store scan image: {e}")
+        scan = Scan(
+            user_id=user_id,
+            disease_name=result.get("diseaseName"),
+            crop=result.get("crop") or crop or None,
+            confidence=float(result.get("confidence") or 0.0),
+            severity=result.get("severity"),
+            image_url=url,
+        )
+        if scan_id:
+            scan.id = scan_id
+        async with AsyncSessionLocal() as db:
+            db.add(scan)
+            await db.commit()
+        return scan.id
+    except Exception as e:
+        print(f"⚠️  Could not save scan: {e}")
+        return None
@@ -0,0 +1,231 @@
+"""
+Outbound SMS dispatch queue.
+Requests enqueue a message and return immediately; a few background workers
+deliver it through a pluggable transport with bounded concurrency, retrying
+transient failures. Messages that still fail land in a dead-letter log.
+
+Transports:
+- TwilioHTTPTransport (default): Twilio's REST API over the pooled httpx
+  client. TWILIO_API_BASE can point it at a local HTTP stub.
+- TwilioSDKTransport: the official twilio package, run on a worker thread.
+"""
+
+import asyncio
+import json
+import random
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.http import http_clients
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class SMSError(Exception):
+    """SMS delivery failed. retryable is False for rejections that won't change (bad number, auth)."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retryable: bool = True,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class TwilioHTTPTransport:
+    name = "twilio-http"
+
+    def __init__(self, base_url: str, account_sid: str, auth_token: str, from_number: str):
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.auth = (account_sid, auth_token)
+        self.from_number = from_number
+
+    async def send(self, to: str, body: str) -> Optional[str]:
+        """Send one SMS; returns the provider message id."""
+        client = http_clients.get("twilio")
+        try:
+            response = await client.post(
+                self.url,
+                data={"To": to, "From": self.from_number, "Body": body},
+                auth=self.auth,
+            )
+        except httpx.HTTPError as e:
+            raise SMSError(f"connection error: {e}")
+
+        if response.status_code in (200, 201):
+            # Accepted — a body we can't parse only costs us the message id
+            try:
+                return response.json().get("sid")
+            except ValueError:
+                return None
+
+        retry_after = None
+        try:
+            retry_after = float(response.headers.get("retry-after", ""))
+        except ValueError:
+            pass
+        raise SMSError(
+            f"{response.status_code}: {response.text[:200]}",
+            response.status_code,
+            retryable=response.status_code in RETRYABLE_STATUS,
+            retry_after=retry_after,
+        )
+
+
+class TwilioSDKTransport:
+    name = "twilio-sdk"
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str):
+        try:
+            from twilio.rest import Client
+        except ImportError:
+            raise RuntimeError("twilio package not installed — use SMS_TRANSPORT=http")
+        self._client = Client(account_sid, auth_token)
+        self.from_number = from_number
+
+    async def send(self, to: str, body: str) -> Optional[str]:
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            message = await asyncio.to_thread(
+                self._client.messages.create, body=body, from_=self.from_number, to=to
+            )
+        except TwilioRestException as e:
+            raise SMSError(str(e), e.status, retryable=e.status in RETRYABLE_STATUS)
+        except Exception as e:
+            raise SMSError(f"connection error: {e}")
+        return message.sid
+
+
+def make_transport(kind: Optional[str] = None):
+    """Build the configured transport, or None when Twilio credentials are missing."""
+    if not (settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN):
+        return None
+    kind = kind or settings.SMS_TRANSPORT
+    if kind == "sdk":
+        return TwilioSDKTransport(
+            settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_PHONE_NUMBER
+        )
+    return TwilioHTTPTransport(
+        settings.TWILIO_API_BASE,
+        settings.TWILIO_ACCOUNT_SID,
+        settings.TWILIO_AUTH_TOKEN,
+        settings.TWILIO_PHONE_NUMBER,
+    )
+
+
+class SMSQueue:
+    def __init__(self, transport=None):
+        """
+        Args:
+            transport: Anything with `async send(to, body)`; replace it to
+                exercise the queue against a stub.
+        """
+        self.transport = transport
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self.stats = {"queued": 0, "sent": 0, "retries": 0, "dead_lettered": 0, "dropped": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the delivery workers (called from the startup hook, or lazily on first enqueue)."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.SMS_QUEUE_MAX_SIZE)
+        self._workers = [
+            asyncio.create_task(self._run()) for _ in range(max(1, settings.SMS_CONCURRENCY))
+        ]
+
+    def enqueue(self, to: str, body: str, purpose: str = "") -> bool:
+        """Queue an SMS for delivery. Returns False if the queue is full and it was dropped."""
+        if not self._workers:
+            self.start()
+        try:
+            self._queue.put_nowait((to, body, purpose))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            print(f"⚠️  SMS queue full — dropped message to {to}")
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Give queued messages a moment to go out, then stop the workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  SMS queue stopped with {self.queue_depth} undelivered messages")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _run(self):
+        while True:
+            to, body, purpose = await self._queue.get()
+            try:
+                await self._deliver(to, body, purpose)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, to: str, body: str, purpose: str):
+        retries = settings.SMS_MAX_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                await self.transport.send(to, body)
+                self.stats["sent"] += 1
+                return
+            except SMSError as e:
+                if not e.retryable or attempt >= retries:
+                    await self._dead_letter(to, purpose, e, attempt + 1)
+                    return
+                if e.retry_after is not None:
+                    wait = min(e.retry_after, settings.SMS_BACKOFF_MAX)
+                else:
+                    wait = random.uniform(0, min(settings.SMS_BACKOFF_MAX, settings.SMS_BACKOFF_BASE * (2 ** attempt)))
+                self.stats["retries"] += 1
+                print(f"🔁 SMS to {to}: {e} — retry {attempt + 1}/{retries} in {wait:.2f}s")
+                await asyncio.sleep(wait)
+            except Exception as e:
+                # Unexpected transport failure (unparseable reply, a bug…): dead-letter it
+                # rather than let it kill the worker
+                await self._dead_letter(to, purpose, SMSError(f"unexpected error: {e!r}", retryable=False), attempt + 1)
+                return
+
+    async def _dead_letter(self, to: str, purpose: str, error: SMSError, attempts: int):
+        """Record an undeliverable SMS. The body is left out — it holds the OTP."""
+        self.stats["dead_lettered"] += 1
+        print(f"⚠️  SMS to {to} failed after {attempts} attempt(s): {error}")
+        record = {
+            "to": to,
+            "purpose": purpose,
+            "error": str(error),
+            "status_code": error.status_code,
+            "attempts": attempts,
+            "failed_at": datetime.utcnow().isoformat(),
+        }
+        try:
+            await asyncio.to_thread(self._append_dead_letter, json.dumps(record))
+        except OSError as e:
+            print(f"⚠️  Could not write SMS dead-letter log: {e}")
+
+    @staticmethod
+    def _append_dead_letter(line: str):
+        with open(settings.SMS_DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+sms_queue = SMSQueue()
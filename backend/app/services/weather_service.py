@@ -0,0 +1,213 @@
+"""
+Weather lookups via Open-Meteo with caching.
+- Geocodes are cached for a long time in a local SQLite file (survives restarts).
+- Forecasts are cached briefly, keyed by lat/lon rounded to ~1 km.
+Concurrent identical lookups share one in-flight upstream call.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from app.core.config import settings
+from app.services.cache import ResponseCache, SQLiteCacheBackend
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+FORECAST_PARAMS = {
+    "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+    "daily": "weather_code,temperature_2m_max,precipitation_probability_max",
+    "timezone": "auto",
+    "forecast_days": 5,
+}
+
+COORD_PRECISION = 2  # ~1.1 km — finer than the forecast grid
+
+
+class LocationNotFound(Exception):
+    pass
+
+
+class WeatherUnavailable(Exception):
+    pass
+
+
+def _get_condition(code: int) -> str:
+    if code == 0:
+        return "Clear Sky"
+    if 1 <= code <= 3:
+        return "Partly Cloudy"
+    if 45 <= code <= 48:
+        return "Foggy"
+    if 51 <= code <= 55:
+        return "Drizzle"
+    if 61 <= code <= 67:
+        return "Rain"
+    if 71 <= code <= 77:
+        return "Snow"
+    if 80 <= code <= 82:
+        return "Showers"
+    if 95 <= code <= 99:
+        return "Thunderstorm"
+    return "Cloudy"
+
+
+def format_weather(data: dict) -> dict:
+    """Shape one Open-Meteo forecast into the response the frontend expects."""
+    if "current" not in data:
+        raise WeatherUnavailable("Weather data unavailable")
+
+    forecast = []
+    for i in range(1, len(data["daily"]["time"])):
+        forecast.append({
+            "day": data["daily"]["time"][i],
+            "temp": round(data["daily"]["temperature_2m_max"][i]),
+            "rainChance": data["daily"]["precipitation_probability_max"][i],
+        })
+
+    return {
+        "temp": round(data["current"]["temperature_2m"]),
+        "condition": _get_condition(data["current"]["weather_code"]),
+        "humidity": data["current"]["relative_humidity_2m"],
+        "windSpeed": data["current"]["wind_speed_10m"],
+        "forecast": forecast,
+    }
+
+
+def round_coords(lat: float, lon: float) -> Tuple[float, float]:
+    return round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+
+
+class WeatherService:
+    def __init__(self):
+        self._geocode_cache: Optional[ResponseCache] = None
+        self.forecast_cache = ResponseCache(
+            "forecast",
+            ttl=settings.WEATHER_FORECAST_TTL,
+            stale_ttl=settings.WEATHER_FORECAST_STALE_TTL,
+        )
+
+    @property
+    def geocode_cache(self) -> ResponseCache:
+        # Opened lazily so importing the module never touches the disk
+        if self._geocode_cache is None:
+            self._geocode_cache = ResponseCache(
+                "geocode",
+                ttl=settings.GEOCODE_CACHE_TTL,
+                backend=SQLiteCacheBackend(settings.GEOCODE_CACHE_PATH),
+            )
+        return self._geocode_cache
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        return {"geocode": self.geocode_cache.stats, "forecast": self.forecast_cache.stats}
+
+    @staticmethod
+    def _normalize(location: str) -> str:
+        return " ".join(location.split()).lower()
+
+    async def geocode(self, location: str, client: httpx.AsyncClient) -> Tuple[float, float]:
+        """Resolve a place name to (lat, lon). Raises LocationNotFound."""
+
+        async def fetch():
+            resp = await client.get(
+                GEOCODING_URL,
+                params={"name": location, "count": 1, "language": "en", "format": "json"},
+            )
+            results = resp.json().get("results")
+            if not results:
+                # Not cached — a typo shouldn't stick for the whole TTL
+                raise LocationNotFound(location)
+            return [results[0]["latitude"], results[0]["longitude"]]
+
+        coords, _ = await self.geocode_cache.get_or_compute(self._normalize(location), fetch)
+        return coords[0], coords[1]
+
+    async def forecast(self, lat: float, lon: float, client: httpx.AsyncClient) -> dict:
+        """Formatted forecast for a point. Raises WeatherUnavailable."""
+        lat, lon = round_coords(lat, lon)
+
+        async def fetch():
+            resp = await client.get(
+                FORECAST_URL,
+                params={"latitude": lat, "longitude": lon, **FORECAST_PARAMS},
+            )
+            return format_weather(resp.json())
+
+        result, _ = await self.forecast_cache.get_or_compute(f"{lat}:{lon}", fetch)
+        return result
+
+    async def geocode_many(
+        self, locations: List[str], client: httpx.AsyncClient, concurrency: int
+    ) -> List[Union[Tuple[float, float], Exception]]:
+        """Geocode several places concurrently, at most `concurrency` upstream calls at once."""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(location: str):
+            async with semaphore:
+                return await self.geocode(location, client)
+
+        return await asyncio.gather(*(one(loc) for loc in locations), return_exceptions=True)
+
+    async def forecast_many(
+        self, coords: List[Tuple[float, float]], client: httpx.AsyncClient
+    ) -> Dict[Tuple[float, float], Union[dict, Exception]]:
+        """
+        Formatted forecasts for many points. Cached points are served from the
+        forecast cache; the rest are fetched in ONE multi-coordinate Open-Meteo call.
+        """
+        results: Dict[Tuple[float, float], Union[dict, Exception]] = {}
+        missing = []
+        for point in dict.fromkeys(round_coords(lat, lon) for lat, lon in coords):
+            cached = await self.forecast_cache.peek(f"{point[0]}:{point[1]}")
+            if cached is not None:
+                results[point] = cached
+            else:
+                missing.append(point)
+
+        if not missing:
+            return results
+
+        try:
+            resp = await client.get(
+                FORECAST_URL,
+                params={
+                    "latitude": ",".join(str(lat) for lat, _ in missing),
+                    "longitude": ",".join(str(lon) for _, lon in missing),
+                    **FORECAST_PARAMS,
+                },
+            )
+            if resp.status_code != 200:
+                raise WeatherUnavailable(f"Weather service returned {resp.status_code}")
+            payload = resp.json()
+        except (httpx.HTTPError, ValueError, WeatherUnavailable) as e:
+            # Keep the per-location contract: every uncached point reports the failure
+            print(f"⚠️  Batch forecast failed for {len(missing)} points: {e}")
+            error = e if isinstance(e, WeatherUnavailable) else WeatherUnavailable("Weather service unavailable")
+            for point in missing:
+                results[point] = error
+            return results
+
+        # Open-Meteo returns a list for several coordinates, a bare object for one
+        items = payload if isinstance(payload, list) else [payload]
+
+        for i, point in enumerate(missing):
+            try:
+                if i >= len(items):
+                    raise WeatherUnavailable("Weather data unavailable")
+                formatted = format_weather(items[i])
+                await self.forecast_cache.put(f"{point[0]}:{point[1]}", formatted)
+                results[point] = formatted
+            except WeatherUnavailable as e:
+                results[point] = e
+        return results
+
+    async def close(self):
+        if self._geocode_cache is not None:
+            await self._geocode_cache.backend.close()
+            self._geocode_cache = None
+
+
+weather_service = WeatherService()
@@ -0,0 +1,31 @@
+"""Composite indexes for OTP rate-limit and verification lookups
+
+Revision ID: 0001_otp_lookup_indexes
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0001_otp_lookup_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_otps_email_created_at", ["email", "created_at"]),
+    ("ix_otps_phone_created_at", ["phone", "created_at"]),
+    ("ix_otps_email_purpose_created_at", ["email", "purpose", "created_at"]),
+    ("ix_otps_phone_purpose_created_at", ["phone", "purpose", "created_at"]),
+]
+
+
+def upgrade():
+    # if_not_exists: fresh databases already got these from init_db()
+    for name, columns in INDEXES:
+        op.create_index(name, "otps", columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="otps", if_exists=True)
@@ -0,0 +1,21 @@
+"""Index otps.expires_at for the background expiry sweeper
+
+Revision ID: 0002_otp_expires_at_index
+Revises: 0001_otp_lookup_indexes
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0002_otp_expires_at_index"
+down_revision = "0001_otp_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_otps_expires_at", "otps", ["expires_at"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_otps_expires_at", table_name="otps", if_exists=True)
@@ -0,0 +1,26 @@
+"""Index scans on (user_id, scan_date, id) for paginated scan history
+
+Revision ID: 0003_scan_history_index
+Revises: 0002_otp_expires_at_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0003_scan_history_index"
+down_revision = "0002_otp_expires_at_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_scans_user_id_scan_date_id",
+        "scans",
+        ["user_id", "scan_date", "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_scans_user_id_scan_date_id", table_name="scans", if_exists=True)
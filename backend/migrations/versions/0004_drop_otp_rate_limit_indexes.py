@@ -0,0 +1,32 @@
+"""Drop the OTP (contact, created_at) indexes left over from the COUNT(*) rate limit
+
+Rate limiting moved to app/core/rate_limit.py, so nothing queries OTPs by
+contact and time alone any more; the (contact, purpose, created_at) indexes
+still cover verification.
+
+Revision ID: 0004_drop_otp_rate_limit_indexes
+Revises: 0003_scan_history_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0004_drop_otp_rate_limit_indexes"
+down_revision = "0003_scan_history_index"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_otps_email_created_at", ["email", "created_at"]),
+    ("ix_otps_phone_created_at", ["phone", "created_at"]),
+]
+
+
+def upgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="otps", if_exists=True)
+
+
+def downgrade():
+    for name, columns in INDEXES:
+        op.create_index(name, "otps", columns, if_not_exists=True)
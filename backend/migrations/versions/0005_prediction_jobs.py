@@ -0,0 +1,37 @@
+"""Persist prediction job status so any worker can answer GET /predict/jobs/{id}
+
+Revision ID: 0005_prediction_jobs
+Revises: 0004_drop_otp_rate_limit_indexes
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005_prediction_jobs"
+down_revision = "0004_drop_otp_rate_limit_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fresh databases already got the table from init_db()
+    if "prediction_jobs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "prediction_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_prediction_jobs_created_at", "prediction_jobs", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_prediction_jobs_created_at", table_name="prediction_jobs", if_exists=True)
+    op.drop_table("prediction_jobs")
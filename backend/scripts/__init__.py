@@ -0,0 +1 @@
+# Maintenance and benchmark scripts
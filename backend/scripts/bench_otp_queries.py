@@ -0,0 +1,131 @@
+"""
+Benchmark the OTP verification lookup at scale.
+
+Builds a throwaway SQLite database with N OTP rows (default 1,000,000),
+times the lookup without the composite indexes, then adds the indexes
+from app/models/otp.py and times it again. (OTP send rate limiting no
+longer queries this table — see app/core/rate_limit.py.)
+
+Usage (from backend/):
+    python -m scripts.bench_otp_queries --rows 1000000 --samples 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+
+from app.database import Base
+from app.models.otp import OTP
+
+PURPOSES = ["signup", "login", "forgot_password"]
+
+
+def verify_lookup(contact_col, contact, code, purpose):
+    return (
+        select(OTP)
+        .where(OTP.code == code, contact_col == contact, OTP.purpose == purpose)
+        .order_by(OTP.created_at.desc())
+        .limit(1)
+    )
+
+
+def populate(engine, rows: int, contacts: int, now: datetime):
+    print(f"📦 Inserting {rows:,} OTP rows...")
+    started = time.perf_counter()
+    chunk = 50_000
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk):
+            batch = []
+            for _ in range(min(chunk, rows - offset)):
+                created = now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))
+                is_email = random.random() < 0.5
+                contact = random.randrange(contacts)
+                batch.append((
+                    str(uuid.uuid4()),
+                    f"{random.randrange(1_000_000):06d}",
+                    "email" if is_email else "sms",
+                    random.choice(PURPOSES),
+                    f"user{contact}@example.com" if is_email else None,
+                    None if is_email else f"+91{9_000_000_000 + contact}",
+                    random.random() < 0.7,
+                    0,
+                    created + timedelta(minutes=5),
+                    created,
+                ))
+            conn.exec_driver_sql(
+                "INSERT INTO otps (id, code, type, purpose, email, phone, is_verified, attempts, expires_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+    print(f"   done in {time.perf_counter() - started:.1f}s")
+
+
+def time_queries(engine, samples: int, contacts: int) -> dict:
+    timings = {"verify": []}
+    with engine.connect() as conn:
+        for _ in range(samples):
+            contact = random.randrange(contacts)
+            email = f"user{contact}@example.com"
+            code = f"{random.randrange(1_000_000):06d}"
+            stmt = verify_lookup(OTP.email, email, code, random.choice(PURPOSES))
+            t0 = time.perf_counter()
+            conn.execute(stmt).all()
+            timings["verify"].append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def summarize(label: str, timings: dict):
+    print(f"\n{label}")
+    print(f"   {'query':<22}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, values in timings.items():
+        values = sorted(values)
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"   {name:<22}{statistics.median(values):>10.3f}{p95:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--contacts", type=int, default=100_000, help="distinct emails/phones")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--db", help="SQLite file to use (default: temp file, deleted afterwards)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_otps.db")
+    engine = create_engine(f"sqlite:///{path}")
+    now = datetime.utcnow()
+    random.seed(42)
+
+    # Table without the composite indexes, to measure the baseline
+    indexes = list(OTP.__table__.indexes)
+    OTP.__table__.create(engine)
+    for index in indexes:
+        index.drop(engine)
+
+    try:
+        populate(engine, args.rows, args.contacts, now)
+        summarize("⏱️  Without indexes", time_queries(engine, args.samples, args.contacts))
+
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        print(f"\n🔧 Built {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+
+        summarize("⏱️  With indexes", time_queries(engine, args.samples, args.contacts))
+    finally:
+        engine.dispose()
+        if not args.db:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()